@@ -0,0 +1,247 @@
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import QPoint, QRect
+from PyQt6.QtGui import QImage, QPainter, QRegion
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from src.drawing.canvas import Canvas
+from src.drawing.point_buffer import PointBuffer
+from src.drawing.shapes import FreePath, Line, Rectangle, Circle
+from src.drawing.simplify import simplify_points
+from src.managers.history_manager import HistoryManager
+from src.tools.brush_tool import BrushTool
+from src.tools.eraser_tool import EraserTool
+from src.utils.screenshot import ScreenshotManager, CAPTURE_DESKTOP
+
+SCREEN_WIDTH = 1920
+SCREEN_HEIGHT = 1080
+COLORS = ["#FF0000", "#0000FF", "#00FF00", "#000000"]
+_boards = {}
+
+def handwriting_stroke(rng, x, y, samples=200):
+    points = PointBuffer()
+    phase = rng.uniform(0, math.pi)
+    slant = rng.uniform(0.6, 1.4)
+    for i in range(samples):
+        t = i / 12.0
+        points.append_xy(int(x + i * 0.6 + 6 * math.cos(t * 1.7 + phase)),
+                         int(y + 14 * math.sin(t * slant) + 3 * math.sin(t * 4.1)))
+    return points
+
+def generate_board(count, seed=0, samples=200):
+    key = (count, seed, samples)
+    if key not in _boards:
+        _boards[key] = _generate_board(count, seed, samples)
+    return list(_boards[key])
+
+def _generate_board(count, seed, samples):
+    rng = random.Random(seed)
+    elements = []
+    for i in range(count):
+        x = rng.randrange(0, SCREEN_WIDTH - 150)
+        y = rng.randrange(20, SCREEN_HEIGHT - 20)
+        color = rng.choice(COLORS)
+        kind = rng.random()
+        if kind < 0.85:
+            points = simplify_points(handwriting_stroke(rng, x, y, samples), 0.5)
+            elements.append(FreePath(points, color, 3))
+        elif kind < 0.92:
+            elements.append(Line(QPoint(x, y), QPoint(x + rng.randrange(20, 300), y + rng.randrange(-50, 50)),
+                                 color, 3))
+        elif kind < 0.97:
+            elements.append(Rectangle(QPoint(x, y), QPoint(x + rng.randrange(20, 200), y + rng.randrange(10, 120)),
+                                      color, 3))
+        else:
+            elements.append(Circle(QPoint(x, y), rng.randrange(5, 80), color, 3))
+    return elements
+
+def make_canvas(elements):
+    canvas = Canvas()
+    canvas.resize(SCREEN_WIDTH, SCREEN_HEIGHT)
+    for element in elements:
+        canvas.add_element(element)
+    canvas.save_state()
+    return canvas
+
+def measure(func, repeat, setup=None):
+    timings = []
+    for _ in range(repeat):
+        state = setup() if setup else None
+        start = time.perf_counter()
+        func(state)
+        timings.append((time.perf_counter() - start) * 1000)
+        
+    state = setup() if setup else None
+    tracemalloc.start()
+    func(state)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return {
+        "repeat": repeat,
+        "min_ms": round(min(timings), 4),
+        "median_ms": round(statistics.median(timings), 4),
+        "mean_ms": round(statistics.fmean(timings), 4),
+        "py_alloc_net_kb": round(current / 1024, 2),
+        "py_alloc_peak_kb": round(peak / 1024, 2),
+    }
+
+def bench_paint(count, repeat):
+    canvas = make_canvas(generate_board(count))
+    target = QImage(SCREEN_WIDTH, SCREEN_HEIGHT, QImage.Format.Format_ARGB32_Premultiplied)
+    
+    def render(region=None):
+        painter = QPainter(target)
+        if region is None:
+            canvas.render(painter)
+        else:
+            canvas.render(painter, QPoint(), region)
+        painter.end()
+        
+    def cold(_):
+        canvas.invalidate_cache()
+        render()
+        
+    dirty = QRegion(QRect(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2, 16, 16))
+    return {
+        "cold": measure(cold, repeat),
+        "warm_full": measure(lambda _: render(), repeat),
+        "warm_dirty_16px": measure(lambda _: render(dirty), repeat),
+    }
+
+def bench_erase(count, repeat):
+    rng = random.Random(1)
+    positions = [QPoint(rng.randrange(SCREEN_WIDTH), rng.randrange(SCREEN_HEIGHT)) for _ in range(64)]
+    
+    def setup():
+        canvas = make_canvas(generate_board(count))
+        return EraserTool(canvas)
+        
+    def erase(tool):
+        for pos in positions:
+            tool._erase_at(pos)
+            
+    return {"erase_at_x64": measure(erase, repeat, setup)}
+
+def bench_history(count, repeat):
+    elements = generate_board(count)
+    
+    def setup_canvas():
+        return make_canvas(elements)
+        
+    def commit_one(canvas):
+        canvas.add_element(FreePath(handwriting_stroke(random.Random(2), 100, 100), "#FF0000", 3))
+        canvas.save_state()
+        
+    def undo_redo(canvas):
+        canvas.undo()
+        canvas.redo()
+        
+    def setup_manager():
+        manager = HistoryManager()
+        manager.save_state(elements)
+        return manager
+        
+    def save_full_list(manager):
+        manager.save_state(elements + [Line(QPoint(0, 0), QPoint(10, 10), "#FF0000", 3)])
+        
+    return {
+        "canvas_save_state": measure(commit_one, repeat, setup_canvas),
+        "canvas_undo_redo": measure(undo_redo, repeat, lambda: _with_commit(setup_canvas(), commit_one)),
+        "manager_save_state_list": measure(save_full_list, repeat, setup_manager),
+    }
+
+def _with_commit(canvas, commit):
+    commit(canvas)
+    return canvas
+
+def bench_stroke_commit(count, repeat, samples=2000):
+    rng = random.Random(3)
+    stroke = list(handwriting_stroke(rng, 200, 400, samples))
+    
+    def setup():
+        canvas = make_canvas(generate_board(count))
+        return BrushTool(canvas)
+        
+    def draw(tool):
+        tool.mouse_press(stroke[0])
+        tool.mouse_move_batch([(pos, i) for i, pos in enumerate(stroke[1:])])
+        tool.mouse_release(stroke[-1])
+        tool.canvas.save_state()
+        
+    return {"stroke_commit_%d_samples" % samples: measure(draw, repeat, setup)}
+
+def bench_screenshot(repeat):
+    canvas = make_canvas(generate_board(1000))
+    canvas.grab()
+    with tempfile.TemporaryDirectory() as directory:
+        manager = ScreenshotManager(directory)
+        counter = iter(range(10 ** 6))
+        
+        def enqueue(_):
+            manager.save_screenshot(canvas, "bench_%d.png" % next(counter))
+            
+        def save(_):
+            enqueue(_)
+            manager.wait_for_pending()
+            QApplication.processEvents()
+            
+        blocking = measure(enqueue, repeat)
+        manager.wait_for_pending()
+        total = measure(save, repeat)
+        manager.set_capture_mode(CAPTURE_DESKTOP)
+        desktop = measure(save, repeat)
+    return {"save_screenshot_gui_blocking": blocking, "save_screenshot_total": total,
+            "save_desktop_composite_total": desktop}
+
+def run(sizes, repeat):
+    results = {
+        "platform": os.environ.get("QT_QPA_PLATFORM"),
+        "screen": [SCREEN_WIDTH, SCREEN_HEIGHT],
+        "paint": {},
+        "erase": {},
+        "history": {},
+        "stroke": {},
+    }
+    for count in sizes:
+        key = str(count)
+        results["paint"][key] = bench_paint(count, repeat)
+        results["erase"][key] = bench_erase(count, max(1, repeat // 2))
+        results["history"][key] = bench_history(count, repeat)
+        results["stroke"][key] = bench_stroke_commit(count, max(1, repeat // 2))
+    results["screenshot"] = bench_screenshot(max(1, repeat // 2))
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="电子教鞭绘图性能基准测试")
+    parser.add_argument("--sizes", default="100,1000,10000")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", default=None)
+    args = parser.parse_args(argv)
+    
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+    sizes = [int(size) for size in args.sizes.split(",") if size]
+    results = run(sizes, args.repeat)
+    
+    text = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    else:
+        print(text)
+    return results
+
+if __name__ == "__main__":
+    main()
@@ -9,6 +9,7 @@ class ShortcutConfig:
     circle: str = "C"
     text: str = "T"
     magnifier: str = "M"
+    magnifier_freeze: str = "F"
     undo: str = "Ctrl+Z"
     redo: str = "Ctrl+Y"
     clear: str = "Delete"
@@ -1,17 +1,20 @@
-import sys
-import os
 from PyQt6.QtWidgets import QWidget
-from PyQt6.QtCore import Qt, QPoint, QRect
-from PyQt6.QtGui import QPainter, QColor, QBrush
+from PyQt6.QtCore import Qt, QRect, QRectF, QTimer
+from PyQt6.QtGui import QPainter, QColor, QImage
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.tools.brush_tool import BrushTool
-from src.managers.history_manager import HistoryManager
+from src.managers.history_manager import HistoryManager, ADD, REMOVE
+from src.drawing.spatial_index import SpatialIndex
+from src.drawing.shapes import draw_elements
 
 class Canvas(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
-        self.setMouseTracking(True)
+        self._current_tool = None
+        self._pending_samples = []
+        self._input_timer = QTimer(self)
+        self._input_timer.setSingleShot(True)
+        self._input_timer.timeout.connect(self._flush_samples)
         self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents, False)
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground, True)
         self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent, False)
@@ -19,12 +22,34 @@ class Canvas(QWidget):
         self.setAutoFillBackground(False)
         self.current_tool = BrushTool(self)
         self.drawing_elements = []
+        self.spatial_index = SpatialIndex()
         self.history_manager = HistoryManager()
         self.history_manager.save_state(self.drawing_elements)
+        self._pending_ops = []
         self.drawing_mode = True
         self.width_changed_callback = None
         self.toolbar_geometry = None
         self.after_show_callback = None
+        self._cache = None
+        self._cache_valid = False
+        self._cache_dirty_rect = QRect()
+        
+    @property
+    def current_tool(self):
+        return self._current_tool
+        
+    @current_tool.setter
+    def current_tool(self, tool):
+        self._flush_samples()
+        previous = self._current_tool
+        if previous is tool:
+            return
+        if previous:
+            previous.deactivate()
+        self._current_tool = tool
+        if tool:
+            tool.activate()
+        self.setMouseTracking(bool(tool and tool.hover_tracking))
         
     def set_toolbar_geometry(self, geometry):
         self.toolbar_geometry = geometry
@@ -43,40 +68,112 @@ class Canvas(QWidget):
         self._update_window_state()
         
     def _update_window_state(self):
-        if self.drawing_mode:
-            self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents, False)
-            self.setWindowFlags(
-                Qt.WindowType.FramelessWindowHint |
-                Qt.WindowType.WindowStaysOnTopHint |
-                Qt.WindowType.Tool
-            )
+        passthrough = not self.drawing_mode
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents, passthrough)
+        flags = self.windowFlags()
+        if passthrough:
+            flags |= Qt.WindowType.WindowTransparentForInput
         else:
-            self.setWindowFlags(
-                Qt.WindowType.FramelessWindowHint |
-                Qt.WindowType.WindowStaysOnTopHint |
-                Qt.WindowType.Tool |
-                Qt.WindowType.WindowTransparentForInput
-            )
-            self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents, True)
-        from PyQt6.QtCore import QTimer
-        QTimer.singleShot(10, self._delayed_show)
-        
-    def _delayed_show(self):
-        self.showFullScreen()
+            flags &= ~Qt.WindowType.WindowTransparentForInput
+        handle = self.windowHandle()
+        if handle is None:
+            self.setWindowFlags(flags)
+        else:
+            handle.setFlag(Qt.WindowType.WindowTransparentForInput, passthrough)
+            self.overrideWindowFlags(flags)
         if self.after_show_callback:
             self.after_show_callback()
+            
+    def add_element(self, element):
+        self._pending_ops.append((ADD, len(self.drawing_elements), element))
+        self.drawing_elements.append(element)
+        self.spatial_index.insert(element)
+        if self._cache_valid:
+            painter = self._begin_cache_painter()
+            element.draw(painter)
+            painter.end()
+            
+    def remove_elements(self, elements) -> QRect:
+        dirty = QRect()
+        for element in elements:
+            index = self.drawing_elements.index(element)
+            self._pending_ops.append((REMOVE, index, element))
+            del self.drawing_elements[index]
+            self.spatial_index.remove(element)
+            dirty = dirty.united(element.bounding_rect())
+        self.invalidate_cache(dirty)
+        return dirty
+        
+    def replace_element(self, old, new) -> QRect:
+        index = self.drawing_elements.index(old)
+        self._pending_ops.append((REMOVE, index, old))
+        self._pending_ops.append((ADD, index, new))
+        self.drawing_elements[index] = new
+        self.spatial_index.remove(old)
+        self.spatial_index.insert(new, z=old._z_order)
+        dirty = old.bounding_rect().united(new.bounding_rect())
+        self.invalidate_cache(dirty)
+        return dirty
+            
+    def invalidate_cache(self, rect=None):
+        if rect is None:
+            self._cache_valid = False
+        else:
+            self._cache_dirty_rect = self._cache_dirty_rect.united(rect)
+        
+    def _begin_cache_painter(self):
+        painter = QPainter(self._cache)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        return painter
+        
+    def _ensure_cache(self):
+        dpr = self.devicePixelRatioF()
+        width = max(1, round(self.width() * dpr))
+        height = max(1, round(self.height() * dpr))
+        if (self._cache is None or self._cache.width() != width or
+                self._cache.height() != height or self._cache.devicePixelRatio() != dpr):
+            self._cache = QImage(width, height, QImage.Format.Format_ARGB32_Premultiplied)
+            self._cache.setDevicePixelRatio(dpr)
+            self._cache_valid = False
+        if not self._cache_valid:
+            self._cache.fill(Qt.GlobalColor.transparent)
+            painter = self._begin_cache_painter()
+            draw_elements(painter, self.drawing_elements)
+            painter.end()
+            self._cache_valid = True
+        elif not self._cache_dirty_rect.isEmpty():
+            self._repair_cache(self._cache_dirty_rect)
+        self._cache_dirty_rect = QRect()
+        
+    def annotation_image(self) -> QImage:
+        self._ensure_cache()
+        return QImage(self._cache)
+        
+    def _repair_cache(self, dirty: QRect):
+        painter = self._begin_cache_painter()
+        painter.setClipRect(dirty)
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Clear)
+        painter.fillRect(dirty, Qt.GlobalColor.transparent)
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceOver)
+        draw_elements(painter, [element for element in self.drawing_elements
+                                if element.bounding_rect().intersects(dirty)])
+        painter.end()
         
     def paintEvent(self, event):
+        self._ensure_cache()
+        
+        rect = event.rect()
+        dpr = self._cache.devicePixelRatio()
         painter = QPainter(self)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        painter.setClipRegion(event.region())
         
-        painter.fillRect(self.rect(), QColor(255, 255, 255, 1))
-        
-        for element in self.drawing_elements:
-            element.draw(painter)
+        painter.fillRect(rect, QColor(255, 255, 255, 1))
+        painter.drawImage(QRectF(rect), self._cache,
+                          QRectF(rect.x() * dpr, rect.y() * dpr, rect.width() * dpr, rect.height() * dpr))
             
-        if self.current_tool and self.drawing_mode:
+        if self.current_tool and self.current_tool.has_preview and self.drawing_mode:
             self.current_tool.draw_preview(painter)
             
         painter.end()
@@ -86,22 +183,43 @@ class Canvas(QWidget):
             return
         if self._is_in_toolbar(event.globalPosition().toPoint()):
             return
+        self._flush_samples()
         if self.current_tool:
             self.current_tool.mouse_press(event.pos())
             
     def mouseMoveEvent(self, event):
-        if not self.drawing_mode:
+        if not self.drawing_mode or not self.current_tool:
+            return
+        if event.buttons() == Qt.MouseButton.NoButton and not self.current_tool.hover_tracking:
             return
         if self._is_in_toolbar(event.globalPosition().toPoint()):
             return
+        self._pending_samples.append((event.position().toPoint(), event.timestamp()))
+        if not self._input_timer.isActive():
+            self._input_timer.start(self._frame_interval())
+            
+    def _frame_interval(self) -> int:
+        screen = self.screen()
+        refresh_rate = screen.refreshRate() if screen else 0
+        if refresh_rate <= 0:
+            refresh_rate = 60
+        return max(1, int(1000 / refresh_rate))
+        
+    def _flush_samples(self):
+        self._input_timer.stop()
+        if not self._pending_samples:
+            return
+        samples = self._pending_samples
+        self._pending_samples = []
         if self.current_tool:
-            self.current_tool.mouse_move(event.pos())
+            self.current_tool.mouse_move_batch(samples)
             
     def mouseReleaseEvent(self, event):
         if not self.drawing_mode:
             return
         if self._is_in_toolbar(event.globalPosition().toPoint()):
             return
+        self._flush_samples()
         if self.current_tool:
             self.current_tool.mouse_release(event.pos())
             self.save_state()
@@ -111,6 +229,7 @@ class Canvas(QWidget):
             return
         if self._is_in_toolbar(event.globalPosition().toPoint()):
             return
+        self._flush_samples()
         if self.current_tool:
             self.current_tool.mouse_press(event.pos())
             
@@ -121,25 +240,51 @@ class Canvas(QWidget):
             self.redo()
             
     def save_state(self):
-        self.history_manager.save_state(self.drawing_elements)
+        if self._pending_ops:
+            self.history_manager.record(self._pending_ops)
+            self._pending_ops = []
         
     def undo(self):
-        self.drawing_elements = self.history_manager.undo()
-        self.update()
+        self.save_state()
+        entry = self.history_manager.undo_change()
+        if entry:
+            self._apply_history_entry(entry.inverse())
         
     def redo(self):
-        self.drawing_elements = self.history_manager.redo()
-        self.update()
+        self.save_state()
+        entry = self.history_manager.redo_change()
+        if entry:
+            self._apply_history_entry(entry)
+        
+    def _apply_history_entry(self, entry):
+        dirty = QRect()
+        for op, index, element in entry.ops:
+            if op == ADD:
+                self.drawing_elements.insert(index, element)
+                self.spatial_index.insert(element)
+            else:
+                del self.drawing_elements[index]
+                self.spatial_index.remove(element)
+            dirty = dirty.united(element.bounding_rect())
+        self.invalidate_cache(dirty)
+        self.update(dirty)
             
     def clear_canvas(self):
+        for index in reversed(range(len(self.drawing_elements))):
+            self._pending_ops.append((REMOVE, index, self.drawing_elements[index]))
         self.drawing_elements.clear()
+        self.spatial_index.clear()
+        self.invalidate_cache()
         self.save_state()
         self.update()
         
     def wheelEvent(self, event):
         if not self.drawing_mode:
             return
-        if hasattr(self.current_tool, 'width'):
+        if self.current_tool and self.current_tool.wheel(event.angleDelta().y()):
+            self.update()
+            return
+        if self.current_tool and self.current_tool.supports_width:
             delta = event.angleDelta().y()
             if delta > 0:
                 self.current_tool.increase_width()
@@ -0,0 +1,75 @@
+from array import array
+from PyQt6.QtCore import QPoint
+from PyQt6.QtGui import QPolygon
+
+class PointBuffer:
+    __slots__ = ('_data',)
+    
+    def __init__(self, points=()):
+        if isinstance(points, PointBuffer):
+            self._data = array('i', points._data)
+        else:
+            self._data = array('i')
+            for point in points:
+                self.append(point)
+                
+    @classmethod
+    def from_coords(cls, coords) -> 'PointBuffer':
+        buffer = cls()
+        buffer._data = array('i', coords)
+        return buffer
+        
+    def append(self, point: QPoint):
+        self._data.append(point.x())
+        self._data.append(point.y())
+        
+    def append_xy(self, x: int, y: int):
+        self._data.append(x)
+        self._data.append(y)
+        
+    def coords(self) -> array:
+        return self._data
+        
+    def copy(self) -> 'PointBuffer':
+        return PointBuffer(self)
+        
+    def bounds(self):
+        if not self._data:
+            return None
+        xs = self._data[0::2]
+        ys = self._data[1::2]
+        return min(xs), min(ys), max(xs), max(ys)
+        
+    def to_polygon(self) -> QPolygon:
+        polygon = QPolygon()
+        if self._data:
+            polygon.resize(len(self))
+            ptr = polygon.data()
+            ptr.setsize(len(self._data) * self._data.itemsize)
+            ptr[:] = self._data.tobytes()
+        return polygon
+        
+    def __len__(self):
+        return len(self._data) // 2
+        
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return PointBuffer([self[i] for i in range(*index.indices(len(self)))])
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("point index out of range")
+        return QPoint(self._data[2 * index], self._data[2 * index + 1])
+        
+    def __iter__(self):
+        data = self._data
+        for i in range(0, len(data), 2):
+            yield QPoint(data[i], data[i + 1])
+            
+    def __eq__(self, other):
+        if isinstance(other, PointBuffer):
+            return self._data == other._data
+        return NotImplemented
+        
+    def __repr__(self):
+        return f"PointBuffer({len(self)} points)"
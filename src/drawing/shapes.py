@@ -1,66 +1,148 @@
-from PyQt6.QtCore import QPoint, QPointF, Qt, QRect
-from PyQt6.QtGui import QPainter, QPen, QColor, QPainterPath, QFont, QFontMetrics
+from PyQt6.QtCore import QPoint, Qt, QRect, QLine
+from PyQt6.QtGui import QPainter
+from .point_buffer import PointBuffer
+from .styles import stroke_style, text_style
+
+def _style_attribute(name):
+    def get(self):
+        return getattr(self.style, name)
+        
+    def set(self, value):
+        self.style = self.style.replace(**{name: value})
+        
+    return property(get, set)
 
 class DrawingElement:
+    _bounds = None
+    _prepared = None
+    _z_order = None
+    
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if not name.startswith('_'):
+            self.invalidate()
+            
+    def invalidate(self):
+        self._bounds = None
+        self._prepared = None
+        
     def draw(self, painter: QPainter):
         pass
+        
+    def batch_key(self):
+        return None
+        
+    def draw_batch(self, painter: QPainter, elements):
+        for element in elements:
+            element.draw(painter)
+            
+    def prepared(self):
+        if self._prepared is None:
+            self._prepared = self._prepare()
+        return self._prepared
+        
+    def _prepare(self):
+        return ()
+        
+    def bounding_rect(self) -> QRect:
+        if self._bounds is None:
+            self._bounds = self._compute_bounds()
+        return self._bounds
+        
+    def _compute_bounds(self) -> QRect:
+        return QRect()
+        
+    def _stroke_bounds(self, left, top, right, bottom, width) -> QRect:
+        margin = width // 2 + 2
+        return QRect(left - margin, top - margin,
+                     right - left + 2 * margin + 1, bottom - top + 2 * margin + 1)
+
+class StrokedElement(DrawingElement):
+    color = _style_attribute("color")
+    width = _style_attribute("width")
+    opacity = _style_attribute("opacity")
+    fill_color = _style_attribute("fill_color")
+    
+    def batch_key(self):
+        return type(self), self.style
 
-class FreePath(DrawingElement):
-    def __init__(self, points, color, width):
-        self.points = points
-        self.color = color
-        self.width = width
+class FreePath(StrokedElement):
+    def __init__(self, points, color, width, opacity=255):
+        self.points = points if isinstance(points, PointBuffer) else PointBuffer(points)
+        self.style = stroke_style(color, width, opacity, Qt.PenCapStyle.RoundCap, Qt.PenJoinStyle.RoundJoin)
         
     def draw(self, painter: QPainter):
         if len(self.points) < 2:
             return
             
-        pen = QPen(QColor(self.color))
-        pen.setWidth(self.width)
-        pen.setCapStyle(Qt.PenCapStyle.RoundCap)
-        pen.setJoinStyle(Qt.PenJoinStyle.RoundJoin)
-        painter.setPen(pen)
-        
-        path = QPainterPath()
-        path.moveTo(QPointF(self.points[0]))
-        for point in self.points[1:]:
-            path.lineTo(QPointF(point))
-        painter.drawPath(path)
+        painter.setPen(self.style.pen)
+        painter.drawPolyline(self.prepared())
+        
+    def batch_key(self):
+        if len(self.points) < 2:
+            return None
+        return FreePath, self.style
+        
+    def draw_batch(self, painter: QPainter, elements):
+        painter.setPen(self.style.pen)
+        for element in elements:
+            painter.drawPolyline(element.prepared())
+            
+    def _prepare(self):
+        return self.points.to_polygon()
+        
+    def _compute_bounds(self) -> QRect:
+        bounds = self.points.bounds()
+        if bounds is None:
+            return QRect()
+        return self._stroke_bounds(*bounds, self.width)
 
-class Line(DrawingElement):
-    def __init__(self, start, end, color, width):
+class Line(StrokedElement):
+    def __init__(self, start, end, color, width, opacity=255):
         self.start = start
         self.end = end
-        self.color = color
-        self.width = width
+        self.style = stroke_style(color, width, opacity, Qt.PenCapStyle.RoundCap)
         
     def draw(self, painter: QPainter):
-        pen = QPen(QColor(self.color))
-        pen.setWidth(self.width)
-        pen.setCapStyle(Qt.PenCapStyle.RoundCap)
-        painter.setPen(pen)
-        painter.drawLine(self.start, self.end)
+        painter.setPen(self.style.pen)
+        painter.drawLine(self.prepared())
+        
+    def draw_batch(self, painter: QPainter, elements):
+        painter.setPen(self.style.pen)
+        for element in elements:
+            painter.drawLine(element.prepared())
+            
+    def _prepare(self):
+        return QLine(self.start, self.end)
+        
+    def _compute_bounds(self) -> QRect:
+        return self._stroke_bounds(min(self.start.x(), self.end.x()), min(self.start.y(), self.end.y()),
+                                   max(self.start.x(), self.end.x()), max(self.start.y(), self.end.y()),
+                                   self.width)
 
-class Rectangle(DrawingElement):
-    def __init__(self, start, end, color, width, fill_color=""):
+class Rectangle(StrokedElement):
+    def __init__(self, start, end, color, width, fill_color="", opacity=255):
         self.start = start
         self.end = end
-        self.color = color
-        self.width = width
-        self.fill_color = fill_color
+        self.style = stroke_style(color, width, opacity, fill_color=fill_color)
         
     def draw(self, painter: QPainter):
-        pen = QPen(QColor(self.color))
-        pen.setWidth(self.width)
-        painter.setPen(pen)
+        painter.setPen(self.style.pen)
+        painter.setBrush(self.style.brush)
+        painter.drawRect(self.prepared())
         
-        if self.fill_color:
-            painter.setBrush(QColor(self.fill_color))
-        else:
-            painter.setBrush(Qt.BrushStyle.NoBrush)
-            
-        x, y, w, h = self._get_rect()
-        painter.drawRect(x, y, w, h)
+    def batch_key(self):
+        if self.style.fill_color or not self.style.is_opaque():
+            return None
+        return Rectangle, self.style
+        
+    def draw_batch(self, painter: QPainter, elements):
+        painter.setPen(self.style.pen)
+        painter.setBrush(self.style.brush)
+        painter.drawRects([element.prepared() for element in elements])
+        
+    def _prepare(self):
+        return QRect(*self._get_rect())
         
     def _get_rect(self):
         x = min(self.start.x(), self.end.x())
@@ -68,65 +150,91 @@ class Rectangle(DrawingElement):
         w = abs(self.end.x() - self.start.x())
         h = abs(self.end.y() - self.start.y())
         return x, y, w, h
+        
+    def _compute_bounds(self) -> QRect:
+        x, y, w, h = self._get_rect()
+        return self._stroke_bounds(x, y, x + w, y + h, self.width)
 
-class Circle(DrawingElement):
-    def __init__(self, center, radius, color, width, fill_color=""):
+class Circle(StrokedElement):
+    def __init__(self, center, radius, color, width, fill_color="", opacity=255):
         self.center = center
         self.radius = radius
-        self.color = color
-        self.width = width
-        self.fill_color = fill_color
+        self.style = stroke_style(color, width, opacity, fill_color=fill_color)
         
     def draw(self, painter: QPainter):
-        pen = QPen(QColor(self.color))
-        pen.setWidth(self.width)
-        painter.setPen(pen)
+        painter.setPen(self.style.pen)
+        painter.setBrush(self.style.brush)
+        painter.drawEllipse(self.center, self.radius, self.radius)
         
-        if self.fill_color:
-            painter.setBrush(QColor(self.fill_color))
-        else:
-            painter.setBrush(Qt.BrushStyle.NoBrush)
+    def batch_key(self):
+        if self.style.fill_color:
+            return None
+        return Circle, self.style
+        
+    def draw_batch(self, painter: QPainter, elements):
+        painter.setPen(self.style.pen)
+        painter.setBrush(self.style.brush)
+        for element in elements:
+            painter.drawEllipse(element.center, element.radius, element.radius)
             
-        painter.drawEllipse(self.center, self.radius, self.radius)
+    def _compute_bounds(self) -> QRect:
+        return self._stroke_bounds(self.center.x() - self.radius, self.center.y() - self.radius,
+                                   self.center.x() + self.radius, self.center.y() + self.radius,
+                                   self.width)
 
 class EraserStroke(DrawingElement):
     def __init__(self, points, size):
-        self.points = points
+        self.points = points if isinstance(points, PointBuffer) else PointBuffer(points)
         self.size = size
         
     def draw(self, painter: QPainter):
         pass
 
 class TextElement(DrawingElement):
-    def __init__(self, pos, text, color, font_size=16, bold=False, italic=False):
+    color = _style_attribute("color")
+    font_size = _style_attribute("font_size")
+    bold = _style_attribute("bold")
+    italic = _style_attribute("italic")
+    opacity = _style_attribute("opacity")
+    
+    def __init__(self, pos, text, color, font_size=16, bold=False, italic=False, opacity=255):
         self.pos = pos
         self.text = text
-        self.color = color
-        self.font_size = font_size
-        self.bold = bold
-        self.italic = italic
+        self.style = text_style(color, font_size, bold, italic, opacity)
         
     def draw(self, painter: QPainter):
-        font = painter.font()
-        font.setPointSize(self.font_size)
-        font.setBold(self.bold)
-        font.setItalic(self.italic)
-        painter.setFont(font)
-        
-        pen = QPen(QColor(self.color))
-        painter.setPen(pen)
+        painter.setFont(self.style.font)
+        painter.setPen(self.style.pen)
         painter.drawText(self.pos, self.text)
         
     def contains(self, pos: QPoint) -> bool:
-        font = QFont()
-        font.setPointSize(self.font_size)
-        font.setBold(self.bold)
-        font.setItalic(self.italic)
-        
-        fm = QFontMetrics(font)
-        rect = fm.boundingRect(self.text)
+        rect = self.style.metrics.boundingRect(self.text)
         text_rect = QRect(self.pos.x(), self.pos.y() - rect.height(), rect.width(), rect.height())
         return text_rect.contains(pos)
         
+    def _compute_bounds(self) -> QRect:
+        return self.style.metrics.boundingRect(self.text).translated(self.pos).adjusted(-4, -4, 4, 4)
+        
     def update_text(self, text):
         self.text = text
+
+def draw_elements(painter: QPainter, elements):
+    run = []
+    run_key = None
+    for element in elements:
+        key = element.batch_key()
+        if run and key != run_key:
+            _draw_run(painter, run)
+            run = []
+        if key is None:
+            element.draw(painter)
+        else:
+            run.append(element)
+            run_key = key
+    _draw_run(painter, run)
+
+def _draw_run(painter: QPainter, run):
+    if len(run) == 1:
+        run[0].draw(painter)
+    elif run:
+        run[0].draw_batch(painter, run)
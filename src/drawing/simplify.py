@@ -0,0 +1,91 @@
+from array import array
+
+from .point_buffer import PointBuffer
+
+def simplify_points(points: PointBuffer, tolerance: float) -> PointBuffer:
+    return PointBuffer.from_coords(simplify_coords(points.coords(), tolerance))
+
+def simplify_coords(coords, tolerance: float) -> array:
+    coords = _drop_repeats(coords)
+    count = len(coords) // 2
+    if count < 3 or tolerance <= 0:
+        return coords
+        
+    tolerance_sq = tolerance * tolerance
+    keep = bytearray(count)
+    keep[0] = 1
+    keep[count - 1] = 1
+    stack = [(0, count - 1)]
+    
+    while stack:
+        first, last = stack.pop()
+        x1, y1 = coords[2 * first], coords[2 * first + 1]
+        dx = coords[2 * last] - x1
+        dy = coords[2 * last + 1] - y1
+        length_sq = dx * dx + dy * dy
+        
+        max_dist_sq = 0.0
+        index = -1
+        for i in range(first + 1, last):
+            px = coords[2 * i] - x1
+            py = coords[2 * i + 1] - y1
+            if length_sq:
+                t = (px * dx + py * dy) / length_sq
+                if t < 0.0:
+                    t = 0.0
+                elif t > 1.0:
+                    t = 1.0
+                px -= t * dx
+                py -= t * dy
+            dist_sq = px * px + py * py
+            if dist_sq > max_dist_sq:
+                max_dist_sq = dist_sq
+                index = i
+                
+        if max_dist_sq > tolerance_sq:
+            keep[index] = 1
+            stack.append((first, index))
+            stack.append((index, last))
+            
+    result = array('i')
+    for i in range(count):
+        if keep[i]:
+            result.append(coords[2 * i])
+            result.append(coords[2 * i + 1])
+    return result
+
+class StrokeSimplifier:
+    def __init__(self, tolerance: float, chunk_size=128):
+        self.tolerance = tolerance
+        self.chunk_size = chunk_size
+        self._result = array('i')
+        self._anchor = 0
+        
+    def feed(self, points: PointBuffer):
+        coords = points.coords()
+        count = len(coords) // 2
+        while count - 1 - self._anchor >= self.chunk_size:
+            end = self._anchor + self.chunk_size
+            self._extend(coords[2 * self._anchor:2 * end + 2])
+            self._anchor = end
+            
+    def finish(self, points: PointBuffer) -> PointBuffer:
+        self.feed(points)
+        self._extend(points.coords()[2 * self._anchor:])
+        return PointBuffer.from_coords(self._result)
+        
+    def _extend(self, coords):
+        kept = simplify_coords(coords, self.tolerance)
+        if self._result:
+            kept = kept[2:]
+        self._result.extend(kept)
+
+def _drop_repeats(coords) -> array:
+    result = array('i', coords[:2])
+    for i in range(2, len(coords), 2):
+        x = coords[i]
+        y = coords[i + 1]
+        if x != result[-2] or y != result[-1]:
+            result.append(x)
+            result.append(y)
+    return result
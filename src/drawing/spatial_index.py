@@ -0,0 +1,155 @@
+from array import array
+from itertools import compress, count
+from operator import ne
+
+from PyQt6.QtCore import QRect
+
+from src.drawing.shapes import FreePath
+
+class SpatialIndex:
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self._cells = {}
+        self._element_cells = {}
+        self._margin = 0
+        self._z_counter = count()
+        
+    def __len__(self):
+        return len(self._element_cells)
+        
+    def __contains__(self, element):
+        return element in self._element_cells
+        
+    def insert(self, element, z=None):
+        if element in self._element_cells:
+            return
+        if z is not None:
+            element._z_order = z
+        elif element._z_order is None:
+            element._z_order = next(self._z_counter)
+        if isinstance(element, FreePath):
+            ranges = self._segment_ranges(element.points.coords())
+            for key, segments in ranges.items():
+                self._cells.setdefault(key, {})[element] = segments
+            self._margin = max(self._margin, element.width // 2 + 1)
+            keys = tuple(ranges)
+        else:
+            keys = ()
+            rect = element.bounding_rect()
+            if not rect.isEmpty():
+                keys = tuple(self._keys_for(rect.left(), rect.top(), rect.right(), rect.bottom()))
+                for key in keys:
+                    self._cells.setdefault(key, {})[element] = None
+        self._element_cells[element] = keys
+        
+    def remove(self, element):
+        keys = self._element_cells.pop(element, ())
+        for key in keys:
+            cell = self._cells[key]
+            del cell[element]
+            if not cell:
+                del self._cells[key]
+                
+    def clear(self):
+        self._cells.clear()
+        self._element_cells.clear()
+        
+    def rebuild(self, elements):
+        self.clear()
+        for element in elements:
+            self.insert(element)
+            
+    def z_order(self, element):
+        return element._z_order
+        
+    def query(self, rect: QRect) -> dict:
+        candidates = {}
+        margin = self._margin
+        for key in self._keys_for(rect.left() - margin, rect.top() - margin,
+                                  rect.right() + margin, rect.bottom() + margin):
+            cell = self._cells.get(key)
+            if not cell:
+                continue
+            for element, segments in cell.items():
+                if segments is None:
+                    candidates[element] = None
+                else:
+                    candidates.setdefault(element, []).extend(map(range, segments[0::2], segments[1::2]))
+        return candidates
+        
+    def query_elements(self, rect: QRect) -> list:
+        found = set()
+        margin = self._margin
+        for key in self._keys_for(rect.left() - margin, rect.top() - margin,
+                                  rect.right() + margin, rect.bottom() + margin):
+            cell = self._cells.get(key)
+            if cell:
+                found.update(cell)
+        return sorted(found, key=self.z_order)
+        
+    def _segment_ranges(self, coords) -> dict:
+        size = self.cell_size
+        cells = list(zip([x // size for x in coords[0::2]], [y // size for y in coords[1::2]]))
+        last = len(cells) - 1
+        ranges = {}
+        start = 0
+        for i in compress(range(last), map(ne, cells, cells[1:])):
+            if i > start:
+                self._add_range(ranges, cells[start], start, i)
+            for key in self._segment_keys(*coords[2 * i:2 * i + 4]):
+                self._add_range(ranges, key, i, i + 1)
+            start = i + 1
+        if last > start:
+            self._add_range(ranges, cells[start], start, last)
+        return ranges
+        
+    def _add_range(self, ranges, key, start, stop):
+        segments = ranges.get(key)
+        if segments is None:
+            ranges[key] = array('i', (start, stop))
+        elif segments[-1] == start:
+            segments[-1] = stop
+        else:
+            segments.append(start)
+            segments.append(stop)
+            
+    def _segment_keys(self, x1, y1, x2, y2):
+        size = self.cell_size
+        cx, cy = x1 // size, y1 // size
+        remaining_x = abs(x2 // size - cx)
+        remaining_y = abs(y2 // size - cy)
+        dx = x2 - x1
+        dy = y2 - y1
+        step_x = 1 if dx > 0 else -1
+        step_y = 1 if dy > 0 else -1
+        next_x = ((cx + (step_x > 0)) * size - x1) / dx if dx else float('inf')
+        next_y = ((cy + (step_y > 0)) * size - y1) / dy if dy else float('inf')
+        delta_x = size / abs(dx) if dx else float('inf')
+        delta_y = size / abs(dy) if dy else float('inf')
+        
+        yield cx, cy
+        while remaining_x or remaining_y:
+            if remaining_x and (not remaining_y or next_x < next_y):
+                cx += step_x
+                next_x += delta_x
+                remaining_x -= 1
+            elif remaining_y and (not remaining_x or next_y < next_x):
+                cy += step_y
+                next_y += delta_y
+                remaining_y -= 1
+            else:
+                yield cx + step_x, cy
+                yield cx, cy + step_y
+                cx += step_x
+                cy += step_y
+                next_x += delta_x
+                next_y += delta_y
+                remaining_x -= 1
+                remaining_y -= 1
+            yield cx, cy
+            
+    def _keys_for(self, left, top, right, bottom):
+        size = self.cell_size
+        for cx in range(left // size, right // size + 1):
+            for cy in range(top // size, bottom // size + 1):
+                yield (cx, cy)
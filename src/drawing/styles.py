@@ -0,0 +1,76 @@
+from PyQt6.QtCore import Qt
+from PyQt6.QtGui import QBrush, QColor, QFont, QFontMetrics, QPen
+
+class StrokeStyle:
+    __slots__ = ("color", "width", "opacity", "cap", "join", "fill_color", "pen", "brush")
+    
+    def __init__(self, color, width, opacity, cap, join, fill_color):
+        self.color = color
+        self.width = width
+        self.opacity = opacity
+        self.cap = cap
+        self.join = join
+        self.fill_color = fill_color
+        self.pen = QPen(_color(color, opacity))
+        self.pen.setWidth(width)
+        self.pen.setCapStyle(cap)
+        self.pen.setJoinStyle(join)
+        if fill_color:
+            self.brush = QBrush(_color(fill_color, opacity))
+        else:
+            self.brush = QBrush(Qt.BrushStyle.NoBrush)
+            
+    def is_opaque(self) -> bool:
+        return self.opacity >= 255
+        
+    def replace(self, **changes) -> "StrokeStyle":
+        values = {name: getattr(self, name) for name in _STROKE_FIELDS}
+        values.update(changes)
+        return stroke_style(**values)
+
+class TextStyle:
+    __slots__ = ("color", "font_size", "bold", "italic", "opacity", "pen", "font", "metrics")
+    
+    def __init__(self, color, font_size, bold, italic, opacity):
+        self.color = color
+        self.font_size = font_size
+        self.bold = bold
+        self.italic = italic
+        self.opacity = opacity
+        self.pen = QPen(_color(color, opacity))
+        self.font = QFont()
+        self.font.setPointSize(font_size)
+        self.font.setBold(bold)
+        self.font.setItalic(italic)
+        self.metrics = QFontMetrics(self.font)
+        
+    def replace(self, **changes) -> "TextStyle":
+        values = {name: getattr(self, name) for name in _TEXT_FIELDS}
+        values.update(changes)
+        return text_style(**values)
+
+_STROKE_FIELDS = ("color", "width", "opacity", "cap", "join", "fill_color")
+_TEXT_FIELDS = ("color", "font_size", "bold", "italic", "opacity")
+_stroke_styles = {}
+_text_styles = {}
+
+def _color(name, opacity) -> QColor:
+    color = QColor(name)
+    if opacity < 255:
+        color.setAlpha(color.alpha() * max(0, opacity) // 255)
+    return color
+
+def stroke_style(color, width, opacity=255, cap=Qt.PenCapStyle.SquareCap,
+                 join=Qt.PenJoinStyle.BevelJoin, fill_color="") -> StrokeStyle:
+    key = (color, width, opacity, cap, join, fill_color)
+    style = _stroke_styles.get(key)
+    if style is None:
+        style = _stroke_styles[key] = StrokeStyle(*key)
+    return style
+
+def text_style(color, font_size, bold=False, italic=False, opacity=255) -> TextStyle:
+    key = (color, font_size, bold, italic, opacity)
+    style = _text_styles.get(key)
+    if style is None:
+        style = _text_styles[key] = TextStyle(*key)
+    return style
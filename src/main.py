@@ -1,20 +1,63 @@
+import time
+START_TIME = time.perf_counter()
+
 import sys
 import os
+import argparse
 from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import Qt
 
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from src.ui.main_window import MainWindow
+from src.utils.startup_profile import StartupProfile, process_start_time
+from src.utils.single_instance import SingleInstance, MESSAGE_SHOW, MESSAGE_QUIT
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(description="电子教鞭工具")
+    parser.add_argument("--startup-profile", action="store_true", help="打印从进程启动到首帧绘制的分阶段耗时")
+    parser.add_argument("--resident", action="store_true", help="常驻后台，关闭时仅隐藏窗口，再次启动可立即唤出")
+    parser.add_argument("--quit", action="store_true", help="退出正在常驻的实例")
+    return parser.parse_known_args(argv)
 
 def main():
-    app = QApplication(sys.argv)
+    args, qt_args = parse_args(sys.argv[1:])
+    process_start = process_start_time() if args.startup_profile else None
+    profile = StartupProfile(args.startup_profile, START_TIME if process_start is None else process_start)
+    if process_start is not None:
+        profile.mark("解释器启动", START_TIME)
+    profile.mark("Qt 模块导入")
+    
+    instance = SingleInstance()
+    if instance.send(MESSAGE_QUIT if args.quit else MESSAGE_SHOW) or args.quit:
+        return
+    profile.mark("单实例检查")
+    
+    app = QApplication(sys.argv[:1] + qt_args)
     app.setApplicationName("电子教鞭工具")
     app.setOrganizationName("Level3")
+    instance.listen()
+    profile.mark("创建应用")
     
-    window = MainWindow()
+    from src.ui.main_window import MainWindow
+    profile.mark("导入主窗口")
+    
+    window = MainWindow(resident=args.resident)
+    instance.set_message_callback(lambda message: _on_instance_message(window, message))
+    if args.resident:
+        app.setQuitOnLastWindowClosed(False)
+    profile.mark("构建窗口")
+    
+    profile.watch_first_paint(window.canvas)
     window.show()
+    profile.mark("显示窗口")
     
-    sys.exit(app.exec())
+    code = app.exec()
+    instance.close()
+    sys.exit(code)
+
+def _on_instance_message(window, message):
+    if message == MESSAGE_QUIT:
+        window.quit_resident()
+    else:
+        window.show_overlay()
 
 if __name__ == "__main__":
     main()
@@ -1,41 +1,79 @@
-from typing import List
-import copy
+from dataclasses import dataclass, field
+from typing import Any, List, Optional, Tuple
+
+ADD = "add"
+REMOVE = "remove"
+
+@dataclass
+class HistoryEntry:
+    ops: List[Tuple[str, int, Any]] = field(default_factory=list)
+    
+    def apply(self, elements: List):
+        for op, index, element in self.ops:
+            if op == ADD:
+                elements.insert(index, element)
+            else:
+                del elements[index]
+                
+    def inverse(self) -> 'HistoryEntry':
+        return HistoryEntry([(REMOVE if op == ADD else ADD, index, element)
+                             for op, index, element in reversed(self.ops)])
 
 class HistoryManager:
     def __init__(self, max_history=50):
-        self.undo_stack: List[List] = []
-        self.redo_stack: List[List] = []
+        self.undo_stack: List[HistoryEntry] = []
+        self.redo_stack: List[HistoryEntry] = []
         self.max_history = max_history
         self.current_state: List = []
         
     def save_state(self, elements: List):
-        self.undo_stack.append(copy.deepcopy(elements))
+        self.record(self._diff(self.current_state, elements))
+        
+    def record(self, ops) -> HistoryEntry:
+        entry = HistoryEntry(list(ops))
+        entry.apply(self.current_state)
+        self.undo_stack.append(entry)
         self.redo_stack.clear()
         
         if len(self.undo_stack) > self.max_history:
             self.undo_stack.pop(0)
-            
+        return entry
+        
     def undo(self) -> List:
+        self.undo_change()
+        return list(self.current_state)
+        
+    def redo(self) -> List:
+        self.redo_change()
+        return list(self.current_state)
+        
+    def undo_change(self) -> Optional[HistoryEntry]:
         if not self.undo_stack:
-            return []
+            return None
             
-        current = self.undo_stack.pop()
-        self.redo_stack.append(current)
-        
-        if self.undo_stack:
-            return copy.deepcopy(self.undo_stack[-1])
-        return []
+        entry = self.undo_stack.pop()
+        entry.inverse().apply(self.current_state)
+        self.redo_stack.append(entry)
+        return entry
         
-    def redo(self) -> List:
+    def redo_change(self) -> Optional[HistoryEntry]:
         if not self.redo_stack:
-            return []
+            return None
             
-        state = self.redo_stack.pop()
-        self.undo_stack.append(state)
-        return copy.deepcopy(state)
+        entry = self.redo_stack.pop()
+        entry.apply(self.current_state)
+        self.undo_stack.append(entry)
+        return entry
         
     def can_undo(self) -> bool:
         return len(self.undo_stack) > 1
         
     def can_redo(self) -> bool:
         return len(self.redo_stack) > 0
+        
+    def _diff(self, old: List, new: List) -> List[Tuple[str, int, Any]]:
+        old_ids = {id(element) for element in old}
+        new_ids = {id(element) for element in new}
+        ops = [(REMOVE, i, old[i]) for i in reversed(range(len(old))) if id(old[i]) not in new_ids]
+        ops.extend((ADD, i, element) for i, element in enumerate(new) if id(element) not in old_ids)
+        return ops
@@ -1,8 +1,14 @@
 from abc import ABC, abstractmethod
-from PyQt6.QtCore import QPoint
+from PyQt6.QtCore import QPoint, QRect
 from PyQt6.QtGui import QPainter
 
 class BaseTool(ABC):
+    hover_tracking = False
+    supports_width = False
+    supports_color = False
+    supports_font_size = False
+    has_preview = False
+    
     def __init__(self, canvas):
         self.canvas = canvas
         self.start_pos = None
@@ -20,5 +26,23 @@ class BaseTool(ABC):
     def mouse_release(self, pos: QPoint):
         pass
         
+    def mouse_move_batch(self, samples):
+        for pos, timestamp in samples:
+            self.mouse_move(pos)
+            
+    def activate(self):
+        pass
+        
+    def deactivate(self):
+        self.start_pos = None
+        self.current_pos = None
+        
+    def wheel(self, delta: int) -> bool:
+        return False
+        
     def draw_preview(self, painter: QPainter):
         pass
+        
+    def _segment_rect(self, p1: QPoint, p2: QPoint, width: int) -> QRect:
+        margin = width + 2
+        return QRect(p1, p2).normalized().adjusted(-margin, -margin, margin, margin)
@@ -1,51 +1,132 @@
-import sys
-import os
-from PyQt6.QtCore import QPoint, Qt
-from PyQt6.QtGui import QPainter, QPen, QColor
+from PyQt6.QtCore import QPoint, QRect, QRectF, Qt
+from PyQt6.QtGui import QPainter, QImage
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.tools.base_tool import BaseTool
 from src.drawing.shapes import FreePath
+from src.drawing.point_buffer import PointBuffer
+from src.drawing.simplify import StrokeSimplifier
+from src.drawing.styles import stroke_style
 
 class BrushTool(BaseTool):
-    def __init__(self, canvas, color="#FF0000", width=3):
+    supports_width = True
+    supports_color = True
+    has_preview = True
+    
+    def __init__(self, canvas, color="#FF0000", width=3, simplify_tolerance=0.5,
+                 simplify_while_drawing=False, opacity=255):
         super().__init__(canvas)
         self.color = color
         self.width = width
-        self.current_points = []
+        self.opacity = opacity
+        self.simplify_tolerance = simplify_tolerance
+        self.simplify_while_drawing = simplify_while_drawing
+        self.current_points = PointBuffer()
+        self._simplifier = None
+        self._preview_image = None
+        self._preview_dirty = QRect()
         
     def mouse_press(self, pos: QPoint):
         self.start_pos = pos
         self.current_pos = pos
-        self.current_points = [pos]
+        self.current_points = PointBuffer([pos])
+        self._simplifier = StrokeSimplifier(self._logical_tolerance())
+        self._reset_preview_buffer()
         
     def mouse_move(self, pos: QPoint):
-        if self.start_pos:
+        self.mouse_move_batch([(pos, 0)])
+        
+    def mouse_move_batch(self, samples):
+        if not self.start_pos:
+            return
+        first = len(self.current_points) - 1
+        dirty = QRect()
+        for pos, timestamp in samples:
             self.current_pos = pos
+            last = self.current_points[-1]
+            if self.simplify_while_drawing and self._within_tolerance(last, pos):
+                continue
             self.current_points.append(pos)
-            self.canvas.update()
+            dirty = dirty.united(self._segment_rect(last, pos, self.width))
+        self._rasterize_from(first)
+        self._simplifier.feed(self.current_points)
+        self.canvas.update(dirty)
             
     def mouse_release(self, pos: QPoint):
         if self.current_points:
-            path = FreePath(self.current_points.copy(), self.color, self.width)
-            self.canvas.drawing_elements.append(path)
-        self.current_points = []
+            if self.current_pos and self.current_pos != self.current_points[-1]:
+                self.current_points.append(self.current_pos)
+            points = self._simplifier.finish(self.current_points)
+            path = FreePath(points, self.color, self.width, self.opacity)
+            self.canvas.add_element(path)
+            self.canvas.update(self._preview_dirty.united(path.bounding_rect()))
+        self.current_points = PointBuffer()
+        self._simplifier = None
         self.start_pos = None
-        self.canvas.update()
+        
+    def deactivate(self):
+        super().deactivate()
+        self.current_points = PointBuffer()
+        self._simplifier = None
         
     def draw_preview(self, painter):
-        if len(self.current_points) < 2:
+        if len(self.current_points) < 2 or self._preview_image is None:
+            return
+            
+        rect = self._preview_dirty
+        if painter.hasClipping():
+            rect = rect.intersected(painter.clipBoundingRect().toAlignedRect())
+        if rect.isEmpty():
+            return
+        dpr = self._preview_image.devicePixelRatio()
+        opacity = painter.opacity()
+        painter.setOpacity(opacity * self.opacity / 255)
+        painter.drawImage(QRectF(rect), self._preview_image,
+                          QRectF(rect.x() * dpr, rect.y() * dpr, rect.width() * dpr, rect.height() * dpr))
+        painter.setOpacity(opacity)
+        
+    def _reset_preview_buffer(self):
+        dpr = self.canvas.devicePixelRatioF()
+        width = max(1, round(self.canvas.width() * dpr))
+        height = max(1, round(self.canvas.height() * dpr))
+        image = self._preview_image
+        if (image is None or image.width() != width or image.height() != height or
+                image.devicePixelRatio() != dpr):
+            self._preview_image = QImage(width, height, QImage.Format.Format_ARGB32_Premultiplied)
+            self._preview_image.setDevicePixelRatio(dpr)
+            self._preview_image.fill(Qt.GlobalColor.transparent)
+        elif not self._preview_dirty.isEmpty():
+            painter = QPainter(self._preview_image)
+            painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Clear)
+            painter.fillRect(self._preview_dirty, Qt.GlobalColor.transparent)
+            painter.end()
+        self._preview_dirty = QRect()
+        
+    def _rasterize_from(self, index):
+        points = self.current_points
+        if self._preview_image is None or index < 0 or index >= len(points) - 1:
             return
             
-        pen = painter.pen()
-        pen.setColor(QColor(self.color))
-        pen.setWidth(self.width)
-        pen.setCapStyle(Qt.PenCapStyle.RoundCap)
-        painter.setPen(pen)
-        
-        for i in range(len(self.current_points) - 1):
-            painter.drawLine(self.current_points[i], self.current_points[i + 1])
+        painter = QPainter(self._preview_image)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.setPen(stroke_style(self.color, self.width, 255, Qt.PenCapStyle.RoundCap,
+                                    Qt.PenJoinStyle.RoundJoin).pen)
+        previous = points[index]
+        for i in range(index + 1, len(points)):
+            point = points[i]
+            painter.drawLine(previous, point)
+            self._preview_dirty = self._preview_dirty.united(self._segment_rect(previous, point, self.width))
+            previous = point
+        painter.end()
             
+    def _logical_tolerance(self) -> float:
+        return self.simplify_tolerance / self.canvas.devicePixelRatioF()
+        
+    def _within_tolerance(self, p1: QPoint, p2: QPoint) -> bool:
+        tolerance = self._logical_tolerance()
+        dx = p2.x() - p1.x()
+        dy = p2.y() - p1.y()
+        return dx * dx + dy * dy < tolerance * tolerance
+        
     def increase_width(self, delta=1):
         self.width = min(self.width + delta, 50)
         
@@ -1,22 +1,20 @@
-import sys
-import os
-from PyQt6.QtCore import QPoint, QRectF
+from PyQt6.QtCore import QPoint, QRect, QRectF
 from PyQt6.QtGui import QPainter, QColor, QPen
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.tools.base_tool import BaseTool
 from src.drawing.shapes import EraserStroke, FreePath, Line, Rectangle, Circle
+from src.drawing.point_buffer import PointBuffer
 
 class EraserTool(BaseTool):
     def __init__(self, canvas, size=20):
         super().__init__(canvas)
         self.size = size
-        self.current_points = []
+        self.current_points = PointBuffer()
         
     def mouse_press(self, pos: QPoint):
         self.start_pos = pos
         self.current_pos = pos
-        self.current_points = [pos]
+        self.current_points = PointBuffer([pos])
         self._erase_at(pos)
         
     def mouse_move(self, pos: QPoint):
@@ -28,48 +26,77 @@ class EraserTool(BaseTool):
     def mouse_release(self, pos: QPoint):
         if self.current_points:
             stroke = EraserStroke(self.current_points.copy(), self.size)
-            self.canvas.drawing_elements.append(stroke)
-        self.current_points = []
+            self.canvas.add_element(stroke)
+        self.current_points = PointBuffer()
         self.start_pos = None
         
     def _erase_at(self, pos: QPoint):
         half_size = self.size // 2
-        eraser_rect = (pos.x() - half_size, pos.y() - half_size, 
-                      self.size, self.size)
+        eraser_rect = QRect(pos.x() - half_size, pos.y() - half_size, 
+                            self.size, self.size)
         
+        candidates = self.canvas.spatial_index.query(eraser_rect)
         elements_to_remove = []
-        for element in self.canvas.drawing_elements:
-            if self._intersects(element, eraser_rect):
+        for element, segments in candidates.items():
+            if self._intersects(element, eraser_rect, segments):
                 elements_to_remove.append(element)
         
-        for element in elements_to_remove:
-            self.canvas.drawing_elements.remove(element)
-            
-        self.canvas.update()
+        self.canvas.update(self.canvas.remove_elements(elements_to_remove))
         
-    def _intersects(self, element, eraser_rect):
-        eraser = QRectF(eraser_rect[0], eraser_rect[1], eraser_rect[2], eraser_rect[3])
+    def _intersects(self, element, eraser_rect, segments=None):
+        left = eraser_rect.x()
+        top = eraser_rect.y()
+        right = left + eraser_rect.width()
+        bottom = top + eraser_rect.height()
         
         if isinstance(element, FreePath):
-            for i in range(len(element.points) - 1):
-                p1 = element.points[i]
-                p2 = element.points[i + 1]
-                if self._line_intersects_rect(p1, p2, eraser):
-                    return True
+            margin = element.width / 2
+            coords = element.points.coords()
+            if segments is None:
+                segments = (range(len(coords) // 2 - 1),)
+            for span in segments:
+                for i in span:
+                    x1, y1, x2, y2 = coords[2 * i:2 * i + 4]
+                    if self._segment_intersects_rect(x1, y1, x2, y2, left - margin, top - margin,
+                                                     right + margin, bottom + margin):
+                        return True
             return False
         elif isinstance(element, Line):
-            return self._line_intersects_rect(element.start, element.end, eraser)
+            margin = element.width / 2
+            return self._segment_intersects_rect(element.start.x(), element.start.y(),
+                                                 element.end.x(), element.end.y(),
+                                                 left - margin, top - margin, right + margin, bottom + margin)
         elif isinstance(element, Rectangle):
             x, y, w, h = element._get_rect()
-            rect = QRectF(x, y, w, h)
-            return eraser.intersects(rect)
+            return x <= right and x + w >= left and y <= bottom and y + h >= top
         elif isinstance(element, Circle):
-            return self._circle_intersects_rect(element.center, element.radius, eraser)
+            return self._circle_intersects_rect(element.center, element.radius,
+                                                QRectF(left, top, right - left, bottom - top))
         return False
         
-    def _line_intersects_rect(self, p1, p2, rect):
-        return rect.intersects(QRectF(min(p1.x(), p2.x()), min(p1.y(), p2.y()),
-                                    abs(p2.x() - p1.x()), abs(p2.y() - p1.y())))
+    def _segment_intersects_rect(self, x1, y1, x2, y2, left, top, right, bottom):
+        if (min(x1, x2) > right or max(x1, x2) < left or
+                min(y1, y2) > bottom or max(y1, y2) < top):
+            return False
+        dx = x2 - x1
+        dy = y2 - y1
+        t0 = 0.0
+        t1 = 1.0
+        for p, q in ((-dx, x1 - left), (dx, right - x1), (-dy, y1 - top), (dy, bottom - y1)):
+            if p == 0:
+                if q < 0:
+                    return False
+                continue
+            t = q / p
+            if p < 0:
+                if t > t1:
+                    return False
+                t0 = max(t0, t)
+            else:
+                if t < t0:
+                    return False
+                t1 = min(t1, t)
+        return True
         
     def _circle_intersects_rect(self, center, radius, rect):
         closest_x = max(rect.left(), min(center.x(), rect.right()))
@@ -3,6 +3,8 @@ from PyQt6.QtGui import QPainter, QScreen
 from PyQt6.QtWidgets import QApplication
 from .base_tool import BaseTool
 
+MIN_ZOOM = 0.25
+MAX_ZOOM = 64.0
 
 class MagnifierTool(BaseTool):
     def __init__(self, canvas, zoom_factor: float = 2.0, window_size: int = 200):
@@ -11,6 +13,8 @@ class MagnifierTool(BaseTool):
         self.window_size = window_size
         self._active = False
         self.magnifier_window = None
+        self.wheel_zoom_step = 1.25
+        self.zoom_changed_callback = None
         
     def mouse_press(self, pos: QPoint):
         self._active = True
@@ -22,17 +26,27 @@ class MagnifierTool(BaseTool):
             self.current_pos = pos
             self._update_magnifier(pos)
             
+    def mouse_move_batch(self, samples):
+        self.mouse_move(samples[-1][0])
+        
     def mouse_release(self, pos: QPoint):
         self._active = False
         self._hide_magnifier()
         
+    def deactivate(self):
+        super().deactivate()
+        self.set_frozen(False)
+        if self._active:
+            self._active = False
+            self._hide_magnifier()
+            
     def _show_magnifier(self, pos: QPoint):
         if self.magnifier_window:
-            self.magnifier_window.show_at(pos)
+            self.magnifier_window.show_at(self.canvas.mapToGlobal(pos))
             
     def _update_magnifier(self, pos: QPoint):
         if self.magnifier_window:
-            self.magnifier_window.move_to(pos)
+            self.magnifier_window.move_to(self.canvas.mapToGlobal(pos))
             
     def _hide_magnifier(self):
         if self.magnifier_window:
@@ -48,8 +62,35 @@ class MagnifierTool(BaseTool):
         if self.magnifier_window:
             self.magnifier_window.set_window_size(size)
             
+    def wheel(self, delta: int) -> bool:
+        if not self.is_frozen() or not delta:
+            return False
+        factor = self.zoom_factor * self.wheel_zoom_step ** (delta / 120)
+        self.set_zoom_factor(min(MAX_ZOOM, max(MIN_ZOOM, factor)))
+        if self.zoom_changed_callback:
+            self.zoom_changed_callback(self.zoom_factor)
+        return True
+        
+    def set_frozen(self, frozen: bool):
+        if not self.magnifier_window or frozen == self.is_frozen():
+            return
+        if frozen:
+            self.magnifier_window.freeze()
+        else:
+            self.magnifier_window.unfreeze()
+            
+    def toggle_freeze(self):
+        self.set_frozen(not self.is_frozen())
+        
+    def is_frozen(self) -> bool:
+        return bool(self.magnifier_window and self.magnifier_window.is_frozen())
+        
+    def set_zoom_changed_callback(self, callback):
+        self.zoom_changed_callback = callback
+        
     def set_magnifier_window(self, window):
         self.magnifier_window = window
+        window.set_annotation_source(self.canvas)
         
     def is_active(self) -> bool:
         return self._active
@@ -0,0 +1,61 @@
+def _brush(canvas):
+    from src.tools.brush_tool import BrushTool
+    return BrushTool(canvas)
+
+def _eraser(canvas):
+    from src.tools.eraser_tool import EraserTool
+    return EraserTool(canvas)
+
+def _line(canvas):
+    from src.tools.shape_tool import LineTool
+    return LineTool(canvas)
+
+def _rectangle(canvas):
+    from src.tools.shape_tool import RectangleTool
+    return RectangleTool(canvas)
+
+def _circle(canvas):
+    from src.tools.shape_tool import CircleTool
+    return CircleTool(canvas)
+
+def _text(canvas):
+    from src.tools.text_tool import TextTool
+    return TextTool(canvas)
+
+_TOOL_FACTORIES = {
+    "brush": _brush,
+    "eraser": _eraser,
+    "line": _line,
+    "rectangle": _rectangle,
+    "circle": _circle,
+    "text": _text,
+}
+
+def register_tool(name, factory):
+    _TOOL_FACTORIES[name] = factory
+
+class ToolRegistry:
+    def __init__(self, canvas):
+        self.canvas = canvas
+        self._factories = dict(_TOOL_FACTORIES)
+        self._tools = {}
+        
+    def register(self, name, factory):
+        self._factories[name] = factory
+        self._tools.pop(name, None)
+        
+    def names(self):
+        return list(self._factories)
+        
+    def is_loaded(self, name) -> bool:
+        return name in self._tools
+        
+    def get(self, name):
+        tool = self._tools.get(name)
+        if tool is None:
+            factory = self._factories.get(name)
+            if factory is None:
+                return None
+            tool = factory(self.canvas)
+            self._tools[name] = tool
+        return tool
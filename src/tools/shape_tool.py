@@ -1,17 +1,20 @@
-import sys
-import os
-from PyQt6.QtCore import QPoint, Qt
-from PyQt6.QtGui import QPainter, QPen, QColor
+from PyQt6.QtCore import QPoint, QRect, Qt
+from PyQt6.QtGui import QPainter
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.tools.base_tool import BaseTool
 from src.drawing.shapes import Line, Rectangle, Circle
+from src.drawing.styles import stroke_style
 
 class LineTool(BaseTool):
-    def __init__(self, canvas, color="#FF0000", width=3):
+    supports_width = True
+    supports_color = True
+    has_preview = True
+    
+    def __init__(self, canvas, color="#FF0000", width=3, opacity=255):
         super().__init__(canvas)
         self.color = color
         self.width = width
+        self.opacity = opacity
         
     def mouse_press(self, pos: QPoint):
         self.start_pos = pos
@@ -19,30 +22,43 @@ class LineTool(BaseTool):
         
     def mouse_move(self, pos: QPoint):
         if self.start_pos:
+            dirty = self._preview_rect()
             self.current_pos = pos
-            self.canvas.update()
+            self.canvas.update(dirty.united(self._preview_rect()))
             
+    def mouse_move_batch(self, samples):
+        self.mouse_move(samples[-1][0])
+        
     def mouse_release(self, pos: QPoint):
+        dirty = self._preview_rect()
         if self.start_pos:
-            line = Line(self.start_pos, pos, self.color, self.width)
-            self.canvas.drawing_elements.append(line)
+            line = Line(self.start_pos, pos, self.color, self.width, self.opacity)
+            self.canvas.add_element(line)
+            dirty = dirty.united(line.bounding_rect())
         self.start_pos = None
-        self.canvas.update()
+        self.canvas.update(dirty)
+        
+    def _preview_rect(self) -> QRect:
+        if self.start_pos and self.current_pos:
+            return self._segment_rect(self.start_pos, self.current_pos, self.width)
+        return QRect()
         
     def draw_preview(self, painter):
         if self.start_pos and self.current_pos:
-            pen = painter.pen()
-            pen.setColor(QColor(self.color))
-            pen.setWidth(self.width)
-            painter.setPen(pen)
+            painter.setPen(stroke_style(self.color, self.width, self.opacity, Qt.PenCapStyle.RoundCap).pen)
             painter.drawLine(self.start_pos, self.current_pos)
 
 class RectangleTool(BaseTool):
-    def __init__(self, canvas, color="#FF0000", width=3, fill_color=""):
+    supports_width = True
+    supports_color = True
+    has_preview = True
+    
+    def __init__(self, canvas, color="#FF0000", width=3, fill_color="", opacity=255):
         super().__init__(canvas)
         self.color = color
         self.width = width
         self.fill_color = fill_color
+        self.opacity = opacity
         
     def mouse_press(self, pos: QPoint):
         self.start_pos = pos
@@ -50,28 +66,33 @@ class RectangleTool(BaseTool):
         
     def mouse_move(self, pos: QPoint):
         if self.start_pos:
+            dirty = self._preview_rect()
             self.current_pos = pos
-            self.canvas.update()
+            self.canvas.update(dirty.united(self._preview_rect()))
             
+    def mouse_move_batch(self, samples):
+        self.mouse_move(samples[-1][0])
+        
     def mouse_release(self, pos: QPoint):
+        dirty = self._preview_rect()
         if self.start_pos:
-            rect = Rectangle(self.start_pos, pos, self.color, self.width, self.fill_color)
-            self.canvas.drawing_elements.append(rect)
+            rect = Rectangle(self.start_pos, pos, self.color, self.width, self.fill_color, self.opacity)
+            self.canvas.add_element(rect)
+            dirty = dirty.united(rect.bounding_rect())
         self.start_pos = None
-        self.canvas.update()
+        self.canvas.update(dirty)
+        
+    def _preview_rect(self) -> QRect:
+        if self.start_pos and self.current_pos:
+            return self._segment_rect(self.start_pos, self.current_pos, self.width)
+        return QRect()
         
     def draw_preview(self, painter):
         if self.start_pos and self.current_pos:
-            pen = painter.pen()
-            pen.setColor(QColor(self.color))
-            pen.setWidth(self.width)
-            painter.setPen(pen)
+            style = stroke_style(self.color, self.width, self.opacity, fill_color=self.fill_color)
+            painter.setPen(style.pen)
+            painter.setBrush(style.brush)
             
-            if self.fill_color:
-                painter.setBrush(QColor(self.fill_color))
-            else:
-                painter.setBrush(Qt.BrushStyle.NoBrush)
-                
             x = min(self.start_pos.x(), self.current_pos.x())
             y = min(self.start_pos.y(), self.current_pos.y())
             w = abs(self.current_pos.x() - self.start_pos.x())
@@ -79,11 +100,16 @@ class RectangleTool(BaseTool):
             painter.drawRect(x, y, w, h)
 
 class CircleTool(BaseTool):
-    def __init__(self, canvas, color="#FF0000", width=3, fill_color=""):
+    supports_width = True
+    supports_color = True
+    has_preview = True
+    
+    def __init__(self, canvas, color="#FF0000", width=3, fill_color="", opacity=255):
         super().__init__(canvas)
         self.color = color
         self.width = width
         self.fill_color = fill_color
+        self.opacity = opacity
         
     def mouse_press(self, pos: QPoint):
         self.start_pos = pos
@@ -91,30 +117,38 @@ class CircleTool(BaseTool):
         
     def mouse_move(self, pos: QPoint):
         if self.start_pos:
+            dirty = self._preview_rect()
             self.current_pos = pos
-            self.canvas.update()
+            self.canvas.update(dirty.united(self._preview_rect()))
             
+    def mouse_move_batch(self, samples):
+        self.mouse_move(samples[-1][0])
+        
     def mouse_release(self, pos: QPoint):
+        dirty = self._preview_rect()
         if self.start_pos:
             radius = int(((pos.x() - self.start_pos.x())**2 + 
                          (pos.y() - self.start_pos.y())**2)**0.5)
-            circle = Circle(self.start_pos, radius, self.color, self.width, self.fill_color)
-            self.canvas.drawing_elements.append(circle)
+            circle = Circle(self.start_pos, radius, self.color, self.width, self.fill_color, self.opacity)
+            self.canvas.add_element(circle)
+            dirty = dirty.united(circle.bounding_rect())
         self.start_pos = None
-        self.canvas.update()
+        self.canvas.update(dirty)
+        
+    def _preview_rect(self) -> QRect:
+        if self.start_pos and self.current_pos:
+            radius = int(((self.current_pos.x() - self.start_pos.x())**2 + 
+                         (self.current_pos.y() - self.start_pos.y())**2)**0.5)
+            offset = QPoint(radius, radius)
+            return self._segment_rect(self.start_pos - offset, self.start_pos + offset, self.width)
+        return QRect()
         
     def draw_preview(self, painter):
         if self.start_pos and self.current_pos:
-            pen = painter.pen()
-            pen.setColor(QColor(self.color))
-            pen.setWidth(self.width)
-            painter.setPen(pen)
+            style = stroke_style(self.color, self.width, self.opacity, fill_color=self.fill_color)
+            painter.setPen(style.pen)
+            painter.setBrush(style.brush)
             
-            if self.fill_color:
-                painter.setBrush(QColor(self.fill_color))
-            else:
-                painter.setBrush(Qt.BrushStyle.NoBrush)
-                
             radius = int(((self.current_pos.x() - self.start_pos.x())**2 + 
                          (self.current_pos.y() - self.start_pos.y())**2)**0.5)
             painter.drawEllipse(self.start_pos, radius, radius)
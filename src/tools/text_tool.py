@@ -1,17 +1,19 @@
-import sys
-import os
+import copy
 from PyQt6.QtCore import QPoint
 from PyQt6.QtWidgets import QInputDialog
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.tools.base_tool import BaseTool
 from src.drawing.shapes import TextElement
 
 class TextTool(BaseTool):
-    def __init__(self, canvas, color="#FF0000", font_size=24):
+    supports_color = True
+    supports_font_size = True
+    
+    def __init__(self, canvas, color="#FF0000", font_size=24, opacity=255):
         super().__init__(canvas)
         self.color = color
         self.font_size = font_size
+        self.opacity = opacity
         self.bold = False
         self.italic = False
         
@@ -20,15 +22,17 @@ class TextTool(BaseTool):
             if isinstance(element, TextElement) and element.contains(pos):
                 text, ok = QInputDialog.getText(self.canvas, "编辑文字", "编辑文字:", text=element.text)
                 if ok:
-                    element.update_text(text)
-                    self.canvas.update()
+                    edited = copy.copy(element)
+                    edited.update_text(text)
+                    self.canvas.update(self.canvas.replace_element(element, edited))
                 return
                 
         text, ok = QInputDialog.getText(self.canvas, "输入文字", "请输入文字:")
         if ok and text:
-            text_element = TextElement(pos, text, self.color, self.font_size, self.bold, self.italic)
-            self.canvas.drawing_elements.append(text_element)
-            self.canvas.update()
+            text_element = TextElement(pos, text, self.color, self.font_size, self.bold, self.italic,
+                                       self.opacity)
+            self.canvas.add_element(text_element)
+            self.canvas.update(text_element.bounding_rect())
             
     def mouse_move(self, pos: QPoint):
         pass
@@ -1,8 +1,21 @@
+import ctypes
+import math
+import zlib
 from PyQt6.QtWidgets import QWidget
-from PyQt6.QtCore import Qt, QPoint, QRect, QTimer
-from PyQt6.QtGui import QPainter, QColor, QPen, QBrush, QRadialGradient, QPainterPath, QScreen
-from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import Qt, QPoint, QRect, QRectF, QTimer
+from PyQt6.QtGui import (QPainter, QColor, QPen, QBrush, QRadialGradient, QScreen, QImage, QPixmap, QFont,
+                         QFontMetrics, QGuiApplication, QCursor)
 
+from src.drawing.shapes import draw_elements
+from src.utils.overlay_hider import OverlayHider
+
+try:
+    _user32 = ctypes.windll.user32
+except AttributeError:
+    _user32 = None
+
+WDA_NONE = 0x00
+WDA_EXCLUDEFROMCAPTURE = 0x11
 
 class MagnifierWindow(QWidget):
     def __init__(self, parent=None):
@@ -24,82 +37,342 @@ class MagnifierWindow(QWidget):
                          self.window_size + self.border_width * 2)
         
         self.current_pos = QPoint(0, 0)
+        self._frame = None
+        self._frame_signature = None
+        self._capture_screen = None
+        self._content = None
+        self._mask = None
+        self._chrome = None
+        self._frozen_levels = []
+        self._frozen_geometry = QRect()
+        self.mip_levels = 3
+        self.annotation_source = None
+        self.pixel_zoom = 8
         self.update_timer = QTimer(self)
+        self.update_timer.setSingleShot(True)
         self.update_timer.timeout.connect(self._update_content)
         self.update_interval = 33
+        self.max_update_interval = 500
+        self._interval = self.update_interval
+        self.freeze_delay = 60
+        self._freeze_pending = False
+        self._hider = OverlayHider()
+        self._excluded = False
         
     def show_at(self, pos: QPoint):
         self.current_pos = pos
         self._update_position()
         self.show()
-        self.update_timer.start(self.update_interval)
+        self._refresh(True)
         
     def move_to(self, pos: QPoint):
+        if pos == self.current_pos:
+            return
         self.current_pos = pos
         self._update_position()
+        if self.isVisible():
+            self._refresh(True)
         
     def _update_position(self):
         x = self.current_pos.x() + self.offset_x
         y = self.current_pos.y() + self.offset_y
         
-        screen = QApplication.primaryScreen()
+        screen = self._screen_at(self.current_pos)
         if screen:
-            screen_geometry = screen.geometry()
-            if x + self.width() > screen_geometry.right():
+            area = screen.availableGeometry()
+            if x + self.width() > area.right():
                 x = self.current_pos.x() - self.width() - self.offset_x
-            if y + self.height() > screen_geometry.bottom():
+            if y + self.height() > area.bottom():
                 y = self.current_pos.y() - self.height() - self.offset_y
-                
+            x = max(area.left(), min(x, area.right() - self.width() + 1))
+            y = max(area.top(), min(y, area.bottom() - self.height() + 1))
+            
         self.move(x, y)
         
+    def _screen_at(self, pos: QPoint) -> QScreen:
+        return QGuiApplication.screenAt(pos) or QGuiApplication.primaryScreen()
+        
     def _update_content(self):
-        self.update()
+        self._refresh()
+        
+    def _refresh(self, moved=False):
+        self._exclude_from_capture(self.isVisible() and not self.is_frozen())
+        if self.is_frozen():
+            self._content = None
+            self.update()
+            return
+        if self._capture() or moved:
+            self._interval = self.update_interval
+            self.update()
+        else:
+            self._interval = min(self._interval * 2, self.max_update_interval)
+        if self.isVisible():
+            self.update_timer.start(self._interval)
+            
+    def _capture_rect(self) -> QRect:
+        capture_size = int(self.window_size / self.zoom_factor)
+        half_size = capture_size // 2
+        return QRect(self.current_pos.x() - half_size, self.current_pos.y() - half_size,
+                     capture_size, capture_size)
+        
+    def _source_rect(self) -> QRectF:
+        if self._frozen_levels:
+            size = self.window_size / self.zoom_factor
+            return QRectF(self.current_pos.x() - size / 2, self.current_pos.y() - size / 2, size, size)
+        return QRectF(self._capture_rect())
+        
+    def _capture(self) -> bool:
+        screen = self._screen_at(self.current_pos)
+        if not screen:
+            return False
+        if screen is not self._capture_screen:
+            self._capture_screen = screen
+            self._frame_signature = None
+            
+        rect = self._capture_rect()
+        origin = screen.geometry().topLeft()
+        frame = screen.grabWindow(0, rect.x() - origin.x(), rect.y() - origin.y(),
+                                  rect.width(), rect.height()).toImage()
+        signature = self._signature(frame, rect)
+        if self._frame is not None and signature == self._frame_signature:
+            return False
+        self._frame = self._remove_ink(frame, rect)
+        self._frame_signature = signature
+        self._content = None
+        return True
+        
+    def _signature(self, frame: QImage, rect: QRect) -> int:
+        bits = frame.constBits()
+        bits.setsize(frame.sizeInBytes())
+        data = memoryview(bits)
+        overlap = rect.intersected(self.geometry())
+        if overlap.isEmpty():
+            return zlib.crc32(data)
+            
+        scale = frame.width() / max(1, rect.width())
+        depth = frame.depth() // 8
+        stride = frame.bytesPerLine()
+        left = round((overlap.left() - rect.x()) * scale) * depth
+        right = round((overlap.right() + 1 - rect.x()) * scale) * depth
+        top = round((overlap.top() - rect.y()) * scale)
+        bottom = min(frame.height(), round((overlap.bottom() + 1 - rect.y()) * scale))
+        signature = zlib.crc32(data[:top * stride])
+        for row in range(top * stride, bottom * stride, stride):
+            signature = zlib.crc32(data[row:row + left], signature)
+            signature = zlib.crc32(data[row + right:row + stride], signature)
+        return zlib.crc32(data[bottom * stride:], signature)
+        
+    def _overlays(self) -> list:
+        windows = [self]
+        if self.annotation_source is not None:
+            windows.append(self.annotation_source.window())
+        return windows
+        
+    def _exclude_from_capture(self, excluded: bool):
+        if _user32 is None or excluded == self._excluded:
+            return
+        affinity = WDA_EXCLUDEFROMCAPTURE if excluded else WDA_NONE
+        if _user32.SetWindowDisplayAffinity(int(self.winId()), affinity):
+            self._excluded = excluded
+            
+    def _remove_ink(self, frame: QImage, rect: QRect) -> QImage:
+        canvas = self.annotation_source
+        if canvas is None or not canvas.drawing_elements:
+            return frame
+        origin = canvas.mapToGlobal(QPoint(0, 0))
+        region = rect.translated(-origin.x(), -origin.y())
+        if not canvas.spatial_index.query_elements(region):
+            return frame
+            
+        cache = canvas.annotation_image()
+        dpr = cache.devicePixelRatio()
+        ink = QImage(frame.size(), QImage.Format.Format_ARGB32_Premultiplied)
+        ink.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(ink)
+        painter.drawImage(QRectF(ink.rect()), cache, QRectF(region.x() * dpr, region.y() * dpr,
+                                                            region.width() * dpr, region.height() * dpr))
+        painter.end()
+        
+        color = QImage(ink.size(), QImage.Format.Format_RGB32)
+        color.fill(Qt.GlobalColor.black)
+        painter = QPainter(color)
+        painter.drawImage(0, 0, ink)
+        painter.end()
+        
+        painter = QPainter(ink)
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_SourceIn)
+        painter.fillRect(ink.rect(), Qt.GlobalColor.white)
+        painter.end()
+        coverage = QImage(ink.size(), QImage.Format.Format_RGB32)
+        coverage.fill(Qt.GlobalColor.black)
+        painter = QPainter(coverage)
+        painter.drawImage(0, 0, ink)
+        painter.end()
+        
+        desktop = frame.convertToFormat(QImage.Format.Format_RGB32)
+        painter = QPainter(desktop)
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_Difference)
+        painter.drawImage(0, 0, color)
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_ColorDodge)
+        painter.drawImage(0, 0, coverage)
+        painter.end()
+        return desktop
+        
+    def freeze(self):
+        if self.is_frozen():
+            return
+        self._hider.hide(self._overlays())
+        self._freeze_pending = True
+        self.update_timer.stop()
+        QTimer.singleShot(self.freeze_delay, self._grab_frozen)
+        
+    def _grab_frozen(self):
+        if not self._freeze_pending:
+            return
+        self._freeze_pending = False
+        screen = self._screen_at(QCursor.pos())
+        image = screen.grabWindow(0).toImage() if screen else QImage()
+        self._hider.restore()
+        if image.isNull():
+            self._refresh(True)
+            return
+            
+        levels = [image]
+        while len(levels) < self.mip_levels and min(levels[-1].width(), levels[-1].height()) > 1:
+            previous = levels[-1]
+            levels.append(previous.scaled(previous.width() // 2, previous.height() // 2,
+                                          Qt.AspectRatioMode.IgnoreAspectRatio,
+                                          Qt.TransformationMode.SmoothTransformation))
+        self._frozen_levels = levels
+        self._frozen_geometry = screen.geometry()
+        self.update_timer.stop()
+        self._refresh(True)
+        
+    def unfreeze(self):
+        if self._freeze_pending:
+            self._freeze_pending = False
+            self._hider.restore()
+        self._frozen_levels = []
+        self._frame = None
+        self._frame_signature = None
+        self._content = None
+        if self.isVisible():
+            self._refresh(True)
+            
+    def is_frozen(self) -> bool:
+        return bool(self._frozen_levels) or self._freeze_pending
+        
+    def _frozen_source(self):
+        level = 0
+        if self.zoom_factor < 1:
+            level = min(len(self._frozen_levels) - 1, int(math.log2(1 / self.zoom_factor)))
+        image = self._frozen_levels[level]
+        scale = image.width() / max(1, self._frozen_geometry.width())
+        rect = self._source_rect().translated(-self._frozen_geometry.x(), -self._frozen_geometry.y())
+        return image, QRectF(rect.x() * scale, rect.y() * scale, rect.width() * scale, rect.height() * scale)
+        
+    def set_annotation_source(self, canvas):
+        self.annotation_source = canvas
         
     def set_zoom_factor(self, factor: float):
         self.zoom_factor = factor
-        self.update()
+        self._chrome = None
+        if self.isVisible():
+            self._refresh(True)
         
     def set_window_size(self, size: int):
         self.window_size = size
         self.setFixedSize(size + self.border_width * 2, 
                          size + self.border_width * 2)
-        self.update()
+        self._chrome = None
+        if self.isVisible():
+            self._refresh(True)
         
     def paintEvent(self, event):
+        self._ensure_layers()
         painter = QPainter(self)
+        if self._content is not None:
+            painter.drawImage(0, 0, self._content)
+        painter.drawPixmap(0, 0, self._chrome)
+        painter.end()
+        
+    def _ensure_layers(self):
+        dpr = self.devicePixelRatioF()
+        if self._chrome is None or self._chrome.devicePixelRatio() != dpr:
+            self._build_chrome(dpr)
+            self._content = None
+        if self._content is None and (self._frame is not None or self._frozen_levels):
+            self._content = self._compose_content(dpr)
+            
+    def _lens_rect(self) -> QRect:
+        radius = self.window_size // 2
+        return QRect(self.width() // 2 - radius, self.height() // 2 - radius, radius * 2, radius * 2)
+        
+    def _new_layer(self, dpr) -> QImage:
+        layer = QImage(round(self.width() * dpr), round(self.height() * dpr),
+                       QImage.Format.Format_ARGB32_Premultiplied)
+        layer.setDevicePixelRatio(dpr)
+        layer.fill(Qt.GlobalColor.transparent)
+        return layer
+        
+    def _build_chrome(self, dpr):
+        self._mask = self._new_layer(dpr)
+        painter = QPainter(self._mask)
         painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QBrush(QColor(255, 255, 255)))
+        painter.drawEllipse(self._lens_rect())
+        painter.end()
         
+        chrome = self._new_layer(dpr)
+        painter = QPainter(chrome)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
         center_x = self.width() // 2
         center_y = self.height() // 2
         radius = self.window_size // 2
-        
-        self._draw_magnified_content(painter, center_x, center_y, radius)
         self._draw_border(painter, center_x, center_y, radius)
         self._draw_crosshair(painter, center_x, center_y, radius)
         self._draw_zoom_indicator(painter)
+        painter.end()
+        self._chrome = QPixmap.fromImage(chrome)
         
-    def _draw_magnified_content(self, painter: QPainter, cx: int, cy: int, radius: int):
-        screen = QApplication.primaryScreen()
-        if not screen:
-            return
+    def _compose_content(self, dpr) -> QImage:
+        if self._frozen_levels:
+            image, source = self._frozen_source()
+        else:
+            image, source = self._frame, QRectF(self._frame.rect())
             
-        capture_size = int(self.window_size / self.zoom_factor)
-        half_size = capture_size // 2
-        
-        capture_x = self.current_pos.x() - half_size
-        capture_y = self.current_pos.y() - half_size
-        
-        pixmap = screen.grabWindow(0, capture_x, capture_y, capture_size, capture_size)
+        content = self._new_layer(dpr)
+        painter = QPainter(content)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform, self.zoom_factor < self.pixel_zoom)
+        painter.drawImage(QRectF(self._lens_rect()), image, source)
+        self._draw_annotations(painter)
+        painter.setCompositionMode(QPainter.CompositionMode.CompositionMode_DestinationIn)
+        painter.drawImage(0, 0, self._mask)
+        painter.end()
+        return content
         
-        clip_path = QPainterPath()
-        clip_path.addEllipse(cx - radius, cy - radius, radius * 2, radius * 2)
-        painter.setClipPath(clip_path)
-        
-        target_rect = QRect(cx - radius, cy - radius, radius * 2, radius * 2)
-        painter.drawPixmap(target_rect, pixmap)
-        
-        painter.setClipping(False)
+    def _draw_annotations(self, painter: QPainter):
+        canvas = self.annotation_source
+        if canvas is None or not canvas.drawing_elements:
+            return
+            
+        source = self._source_rect()
+        origin = canvas.mapToGlobal(QPoint(0, 0))
+        region = source.translated(-origin.x(), -origin.y()).toAlignedRect()
+        hits = [element for element in canvas.spatial_index.query_elements(region)
+                if element.bounding_rect().intersects(region)]
+        if not hits:
+            return
+            
+        lens = self._lens_rect()
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.translate(lens.x(), lens.y())
+        painter.scale(lens.width() / source.width(), lens.height() / source.height())
+        painter.translate(origin.x() - source.x(), origin.y() - source.y())
+        draw_elements(painter, hits)
+        painter.restore()
         
     def _draw_border(self, painter: QPainter, cx: int, cy: int, radius: int):
         gradient = QRadialGradient(cx, cy, radius + self.border_width)
@@ -125,16 +398,18 @@ class MagnifierWindow(QWidget):
         painter.setPen(QPen(QColor(255, 255, 255), 1))
         painter.setBrush(QBrush(QColor(0, 0, 0, 150)))
         
-        text = f"{int(self.zoom_factor)}x"
-        from PyQt6.QtGui import QFont
+        text = f"{round(self.zoom_factor, 1):g}x"
         font = QFont("Microsoft YaHei", 10, QFont.Weight.Bold)
         painter.setFont(font)
         
-        from PyQt6.QtCore import QRectF
-        text_rect = QRectF(self.width() - 35, self.height() - 25, 30, 20)
+        text_width = max(30, QFontMetrics(font).horizontalAdvance(text) + 10)
+        text_rect = QRectF(self.width() - text_width - 5, self.height() - 25, text_width, 20)
         painter.drawRoundedRect(text_rect, 5, 5)
         painter.drawText(text_rect, Qt.AlignmentFlag.AlignCenter, text)
         
     def hideEvent(self, event):
         self.update_timer.stop()
+        self._exclude_from_capture(False)
+        self._frame = None
+        self._content = None
         super().hideEvent(event)
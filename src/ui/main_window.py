@@ -1,40 +1,34 @@
-import sys
-import os
 from PyQt6.QtWidgets import QMainWindow
-from PyQt6.QtCore import Qt
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
 from PyQt6.QtGui import QShortcut, QKeySequence
 from PyQt6.QtWidgets import QApplication
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from src.drawing.canvas import Canvas
 from src.ui.toolbar import Toolbar
-from src.tools.brush_tool import BrushTool
-from src.tools.eraser_tool import EraserTool
-from src.tools.shape_tool import LineTool, RectangleTool, CircleTool
-from src.tools.text_tool import TextTool
-from src.tools.magnifier_tool import MagnifierTool
+from src.tools.registry import ToolRegistry
 from src.managers.style_manager import StyleManager
-from src.utils.screenshot import ScreenshotManager
 from src.config.shortcuts import ShortcutConfig
-from src.ui.magnifier_window import MagnifierWindow
-
-try:
-    from pynput import keyboard
-    PYNPUT_AVAILABLE = True
-except ImportError:
-    PYNPUT_AVAILABLE = False
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    hotkey_triggered = pyqtSignal()
+    
+    def __init__(self, resident=False):
         super().__init__()
+        self.resident = resident
         self.style_manager = StyleManager()
-        self.screenshot_manager = ScreenshotManager()
+        self._screenshot_manager = None
+        self._magnifier_tool = None
+        self.magnifier_window = None
+        self.magnifier_zoom = 2.0
+        self.magnifier_size = 200
+        self.hotkey_listener = None
         self.shortcuts = ShortcutConfig()
         self.init_window()
         self.init_canvas()
         self.init_toolbar()
         self.init_shortcuts()
-        self.init_global_hotkey()
+        self.init_stacking()
+        self.hotkey_triggered.connect(self._on_global_hotkey)
         
     def init_window(self):
         self.setWindowFlags(
@@ -54,15 +48,53 @@ class MainWindow(QMainWindow):
         )
         self.canvas.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground, True)
         self.canvas.after_show_callback = self._raise_toolbar
-        
-        self.magnifier_window = MagnifierWindow()
-        self.magnifier_tool = MagnifierTool(self.canvas)
-        self.magnifier_tool.set_magnifier_window(self.magnifier_window)
+        self.tools = ToolRegistry(self.canvas)
+        self.tools.register("magnifier", lambda canvas: self.magnifier_tool)
+        
+    @property
+    def magnifier_tool(self):
+        if self._magnifier_tool is None:
+            from src.tools.magnifier_tool import MagnifierTool
+            from src.ui.magnifier_window import MagnifierWindow
+            self.magnifier_window = MagnifierWindow()
+            self._magnifier_tool = MagnifierTool(self.canvas)
+            self._magnifier_tool.set_magnifier_window(self.magnifier_window)
+            self._magnifier_tool.set_zoom_factor(self.magnifier_zoom)
+            self._magnifier_tool.set_window_size(self.magnifier_size)
+            self._magnifier_tool.set_zoom_changed_callback(self._on_wheel_zoom)
+        return self._magnifier_tool
+        
+    @property
+    def screenshot_manager(self):
+        if self._screenshot_manager is None:
+            from src.utils.screenshot import ScreenshotManager, CAPTURE_DESKTOP
+            self._screenshot_manager = ScreenshotManager(capture_mode=CAPTURE_DESKTOP)
+            self._screenshot_manager.set_saved_callback(self._on_screenshot_saved)
+        return self._screenshot_manager
         
     def _raise_toolbar(self):
-        self.toolbar.raise_()
         self.toolbar.show()
-        
+        self._restack()
+        
+    def init_stacking(self):
+        app = QApplication.instance()
+        app.focusWindowChanged.connect(self._on_focus_window_changed)
+        app.applicationStateChanged.connect(self._on_application_state_changed)
+        
+    def _restack(self):
+        if self.toolbar.isVisible():
+            self.toolbar.raise_()
+        if self.magnifier_window and self.magnifier_window.isVisible():
+            self.magnifier_window.raise_()
+            
+    def _on_focus_window_changed(self, window):
+        if window is not None and window is not self.toolbar.windowHandle():
+            self._restack()
+            
+    def _on_application_state_changed(self, state):
+        if state == Qt.ApplicationState.ApplicationActive:
+            self._restack()
+            
     def init_toolbar(self):
         self.toolbar = Toolbar(self)
         self.toolbar.move(100, 100)
@@ -97,25 +129,13 @@ class MainWindow(QMainWindow):
         self.toolbar.raise_()
         
     def _on_tool_changed(self, tool_type):
-        style = self.style_manager.get_style()
-        
-        if tool_type == "brush":
-            self.canvas.current_tool = BrushTool(self.canvas, style.color, style.line_width)
-        elif tool_type == "eraser":
-            self.canvas.current_tool = EraserTool(self.canvas, 20)
-        elif tool_type == "line":
-            self.canvas.current_tool = LineTool(self.canvas, style.color, style.line_width)
-        elif tool_type == "rectangle":
-            self.canvas.current_tool = RectangleTool(self.canvas, style.color, style.line_width)
-        elif tool_type == "circle":
-            self.canvas.current_tool = CircleTool(self.canvas, style.color, style.line_width)
-        elif tool_type == "text":
-            self.canvas.current_tool = TextTool(self.canvas, style.color, style.font_size)
-        elif tool_type == "magnifier":
-            self.canvas.current_tool = self.magnifier_tool
-        
+        tool = self.tools.get(tool_type)
+        if tool is None:
+            return
+        self._apply_style(tool)
+        self.canvas.current_tool = tool
         self.toolbar.raise_()
-            
+        
     def _on_color_changed(self, color):
         self.style_manager.set_color(color)
         self._update_tool_style()
@@ -128,40 +148,63 @@ class MainWindow(QMainWindow):
         
     def _on_font_size_changed(self, size):
         self.style_manager.set_font_size(size)
-        if isinstance(self.canvas.current_tool, TextTool):
-            self.canvas.current_tool.font_size = size
+        self._update_tool_style()
         self.toolbar.raise_()
         
     def _update_tool_style(self):
+        if self.canvas.current_tool:
+            self._apply_style(self.canvas.current_tool)
+            
+    def _apply_style(self, tool):
         style = self.style_manager.get_style()
-        if hasattr(self.canvas.current_tool, 'color'):
-            self.canvas.current_tool.color = style.color
-        if hasattr(self.canvas.current_tool, 'width'):
-            self.canvas.current_tool.width = style.line_width
+        if tool.supports_color:
+            tool.color = style.color
+            tool.opacity = style.opacity
+        if tool.supports_width:
+            tool.width = style.line_width
+        if tool.supports_font_size:
+            tool.font_size = style.font_size
             
     def _on_screenshot(self):
-        filepath = self.screenshot_manager.save_screenshot(self.canvas)
-        print(f"截图已保存: {filepath}")
+        self.screenshot_manager.save_screenshot(self.canvas, overlays=[self.toolbar])
         self.toolbar.raise_()
         
+    def _on_screenshot_saved(self, filepath, ok):
+        if ok:
+            print(f"截图已保存: {filepath}")
+        else:
+            print(f"截图保存失败: {filepath}")
+            
     def _on_clear(self):
         self.canvas.clear_canvas()
         self.toolbar.raise_()
         
     def _on_close(self):
+        if self.resident:
+            self.hide_overlay()
+            return
+        if self._screenshot_manager:
+            self._screenshot_manager.wait_for_pending()
         self.canvas.close()
         self.toolbar.close()
-        self.magnifier_window.close()
+        if self.magnifier_window:
+            self.magnifier_window.close()
         QApplication.quit()
         
     def _on_zoom_changed(self, zoom):
-        self.magnifier_tool.set_zoom_factor(float(zoom))
-        self.magnifier_window.set_zoom_factor(float(zoom))
+        self.magnifier_zoom = float(zoom)
+        if self._magnifier_tool:
+            self._magnifier_tool.set_zoom_factor(self.magnifier_zoom)
         self.toolbar.raise_()
         
+    def _on_wheel_zoom(self, zoom):
+        self.magnifier_zoom = zoom
+        self.toolbar.update_zoom(zoom)
+        
     def _on_mag_size_changed(self, size):
-        self.magnifier_tool.set_window_size(size)
-        self.magnifier_window.set_window_size(size)
+        self.magnifier_size = size
+        if self._magnifier_tool:
+            self._magnifier_tool.set_window_size(size)
         self.toolbar.raise_()
         
     def init_shortcuts(self):
@@ -201,6 +244,41 @@ class MainWindow(QMainWindow):
         self.shortcut_magnifier = QShortcut(QKeySequence(self.shortcuts.magnifier), self)
         self.shortcut_magnifier.activated.connect(lambda: self.toolbar.set_tool("magnifier"))
         
+        self.shortcut_magnifier_freeze = QShortcut(QKeySequence(self.shortcuts.magnifier_freeze), self)
+        self.shortcut_magnifier_freeze.activated.connect(self._on_magnifier_freeze)
+        
+    def _on_magnifier_freeze(self):
+        if self.canvas.current_tool is not self.magnifier_tool:
+            self.toolbar.set_tool("magnifier")
+        self.magnifier_tool.toggle_freeze()
+        
+    def _on_global_hotkey(self):
+        if self.isVisible():
+            self._on_penetrate_toggle()
+        else:
+            self.show_overlay()
+            
+    def show_overlay(self):
+        if self.isVisible():
+            self.activateWindow()
+            self._restack()
+            return
+        self.show()
+        self.activateWindow()
+        
+    def hide_overlay(self):
+        if self._magnifier_tool:
+            self._magnifier_tool.set_frozen(False)
+        if self.magnifier_window:
+            self.magnifier_window.hide()
+        self.toolbar.hide()
+        self.canvas.hide()
+        self.hide()
+        
+    def quit_resident(self):
+        self.resident = False
+        self._on_close()
+        
     def _on_penetrate_toggle(self):
         self.canvas.toggle_drawing_mode()
         self.toolbar.update_penetrate_button(self.canvas.drawing_mode)
@@ -212,21 +290,32 @@ class MainWindow(QMainWindow):
         self.canvas.redo()
         
     def init_global_hotkey(self):
-        self.hotkey_listener = None
-        if PYNPUT_AVAILABLE:
-            self.hotkey_listener = keyboard.GlobalHotKeys({
-                '<f9>': self._on_penetrate_toggle
-            })
-            self.hotkey_listener.start()
-            
+        if self.hotkey_listener:
+            return
+        try:
+            from pynput import keyboard
+        except ImportError:
+            return
+        self.hotkey_listener = keyboard.GlobalHotKeys({
+            '<f9>': self.hotkey_triggered.emit
+        })
+        self.hotkey_listener.start()
+        
     def showEvent(self, event):
         super().showEvent(event)
         self.showFullScreen()
         self.canvas.showFullScreen()
         self.toolbar.raise_()
         self.toolbar.show()
+        QTimer.singleShot(0, self.init_global_hotkey)
         
     def closeEvent(self, event):
+        if self.resident:
+            event.ignore()
+            self.hide_overlay()
+            return
         if self.hotkey_listener:
             self.hotkey_listener.stop()
+        if self._screenshot_manager:
+            self._screenshot_manager.wait_for_pending()
         super().closeEvent(event)
@@ -1,16 +1,13 @@
-import sys
-import os
 from PyQt6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QButtonGroup, 
-    QSlider, QLabel, QSpinBox, QFrame, QGridLayout, QSizePolicy
+    QSlider, QLabel, QSpinBox, QDoubleSpinBox, QFrame, QGridLayout, QSizePolicy
 )
-from PyQt6.QtCore import Qt, QPoint, QTimer, QRectF
+from PyQt6.QtCore import Qt, QPoint, QTimer, QRectF, QEvent
 from PyQt6.QtGui import (
     QPainter, QColor, QPen, QBrush, QLinearGradient, 
-    QFont, QPainterPath, QRadialGradient
+    QFont, QPainterPath, QRadialGradient, QPixmap
 )
 
-sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 PRESET_COLORS = [
     "#FF0000", "#FF4500", "#FF8C00", "#FFD700",
@@ -29,14 +26,14 @@ TOOL_INFO = {
     "magnifier": ("放大镜", "M"),
 }
 
-class ModernToolButton(QPushButton):
-    def __init__(self, tool_type, parent=None):
-        super().__init__(parent)
-        self.tool_type = tool_type
-        self.tool_name, self.shortcut = TOOL_INFO.get(tool_type, ("", ""))
-        self.setFixedSize(48, 48)
-        self.setCheckable(True)
-        self.setCursor(Qt.CursorShape.PointingHandCursor)
+_BUTTON_PIXMAPS = {}
+
+def clear_button_cache():
+    _BUTTON_PIXMAPS.clear()
+
+class CachedButton(QPushButton):
+    def __init__(self, *args):
+        super().__init__(*args)
         self.hovered = False
         
     def enterEvent(self, event):
@@ -47,11 +44,49 @@ class ModernToolButton(QPushButton):
         self.hovered = False
         self.update()
         
+    def changeEvent(self, event):
+        if event.type() in (QEvent.Type.PaletteChange, QEvent.Type.StyleChange):
+            clear_button_cache()
+            self.update()
+        super().changeEvent(event)
+        
+    def _cache_key(self):
+        return ()
+        
+    def _render(self, painter: QPainter):
+        pass
+        
     def paintEvent(self, event):
+        dpr = self.devicePixelRatioF()
+        key = (type(self).__name__, self.width(), self.height(), dpr) + self._cache_key()
+        pixmap = _BUTTON_PIXMAPS.get(key)
+        if pixmap is None:
+            pixmap = QPixmap(round(self.width() * dpr), round(self.height() * dpr))
+            pixmap.setDevicePixelRatio(dpr)
+            pixmap.fill(Qt.GlobalColor.transparent)
+            pixmap_painter = QPainter(pixmap)
+            pixmap_painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+            self._render(pixmap_painter)
+            pixmap_painter.end()
+            _BUTTON_PIXMAPS[key] = pixmap
+            
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
-        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        painter.drawPixmap(0, 0, pixmap)
+        painter.end()
+
+class ModernToolButton(CachedButton):
+    def __init__(self, tool_type, parent=None):
+        super().__init__(parent)
+        self.tool_type = tool_type
+        self.tool_name, self.shortcut = TOOL_INFO.get(tool_type, ("", ""))
+        self.setFixedSize(48, 48)
+        self.setCheckable(True)
+        self.setCursor(Qt.CursorShape.PointingHandCursor)
+        
+    def _cache_key(self):
+        return (self.tool_type, self.isChecked(), self.hovered)
         
+    def _render(self, painter: QPainter):
         rect = QRectF(0, 0, self.width(), self.height())
         radius = 10.0
         
@@ -135,26 +170,17 @@ class ModernToolButton(QPushButton):
         painter.drawText(QRectF(0, h - 12, w, 10), Qt.AlignmentFlag.AlignCenter, self.tool_name)
 
 
-class PenetrateButton(QPushButton):
+class PenetrateButton(CachedButton):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setFixedSize(48, 48)
         self.setCheckable(True)
-        self.hovered = False
         self.setCursor(Qt.CursorShape.PointingHandCursor)
         
-    def enterEvent(self, event):
-        self.hovered = True
-        self.update()
-        
-    def leaveEvent(self, event):
-        self.hovered = False
-        self.update()
-        
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    def _cache_key(self):
+        return (self.isChecked(), self.hovered)
         
+    def _render(self, painter: QPainter):
         rect = QRectF(0, 0, self.width(), self.height())
         radius = 10.0
         
@@ -197,26 +223,17 @@ class PenetrateButton(QPushButton):
                         Qt.AlignmentFlag.AlignCenter, "穿透")
 
 
-class ColorButton(QPushButton):
+class ColorButton(CachedButton):
     def __init__(self, color, parent=None):
         super().__init__(parent)
         self.color = color
         self.setFixedSize(22, 22)
-        self.hovered = False
         self.setCursor(Qt.CursorShape.PointingHandCursor)
         
-    def enterEvent(self, event):
-        self.hovered = True
-        self.update()
-        
-    def leaveEvent(self, event):
-        self.hovered = False
-        self.update()
-        
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    def _cache_key(self):
+        return (self.color, self.hovered)
         
+    def _render(self, painter: QPainter):
         rect = QRectF(0, 0, self.width(), self.height())
         
         if self.hovered:
@@ -233,25 +250,16 @@ class ColorButton(QPushButton):
         self.update()
 
 
-class ActionButton(QPushButton):
+class ActionButton(CachedButton):
     def __init__(self, text, parent=None):
         super().__init__(text, parent)
         self.setFixedHeight(38)
-        self.hovered = False
         self.setCursor(Qt.CursorShape.PointingHandCursor)
         
-    def enterEvent(self, event):
-        self.hovered = True
-        self.update()
-        
-    def leaveEvent(self, event):
-        self.hovered = False
-        self.update()
-        
-    def paintEvent(self, event):
-        painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    def _cache_key(self):
+        return (self.text(), self.hovered)
         
+    def _render(self, painter: QPainter):
         rect = QRectF(0, 0, self.width(), self.height())
         radius = 10.0
         
@@ -309,19 +317,13 @@ class Toolbar(QWidget):
         self.auto_hide = False
         self.hide_delay = 3000
         self.hide_timer = QTimer(self)
+        self.hide_timer.setSingleShot(True)
         self.hide_timer.timeout.connect(self.hide)
         self.geometry_changed_callback = None
         self.zoom_changed_callback = None
         self.mag_size_changed_callback = None
         self.close_callback = None
         
-        self.raise_timer = QTimer(self)
-        self.raise_timer.timeout.connect(self._on_raise_timer)
-        self.raise_timer.start(100)
-        
-    def _on_raise_timer(self):
-        self.raise_()
-        
     def init_ui(self):
         main_layout = QVBoxLayout()
         main_layout.setContentsMargins(8, 8, 8, 8)
@@ -490,15 +492,17 @@ class Toolbar(QWidget):
         zoom_label.setStyleSheet("color: #666; font-size: 11px; font-weight: bold;")
         layout.addWidget(zoom_label)
         
-        self.zoom_spin = QSpinBox()
-        self.zoom_spin.setRange(2, 8)
+        self.zoom_spin = QDoubleSpinBox()
+        self.zoom_spin.setRange(0.25, 64)
+        self.zoom_spin.setDecimals(2)
+        self.zoom_spin.setSingleStep(1)
         self.zoom_spin.setValue(2)
         self.zoom_spin.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.zoom_spin.setFixedHeight(32)
         self.zoom_spin.setSuffix("x")
         self.zoom_spin.valueChanged.connect(self._on_zoom_changed)
         self.zoom_spin.setStyleSheet("""
-            QSpinBox {
+            QDoubleSpinBox {
                 background: rgba(255, 255, 255, 220);
                 border: 1px solid #ccc;
                 border-radius: 6px;
@@ -506,10 +510,10 @@ class Toolbar(QWidget):
                 font-size: 12px;
                 font-weight: bold;
             }
-            QSpinBox:hover {
+            QDoubleSpinBox:hover {
                 border-color: #999;
             }
-            QSpinBox::up-button, QSpinBox::down-button {
+            QDoubleSpinBox::up-button, QDoubleSpinBox::down-button {
                 width: 20px;
                 background: rgba(200, 200, 210, 100);
                 border-radius: 3px;
@@ -705,6 +709,11 @@ class Toolbar(QWidget):
         if self.zoom_changed_callback:
             self.zoom_changed_callback(value)
             
+    def update_zoom(self, zoom):
+        self.zoom_spin.blockSignals(True)
+        self.zoom_spin.setValue(zoom)
+        self.zoom_spin.blockSignals(False)
+        
     def _on_mag_size_changed(self, value):
         if self.mag_size_changed_callback:
             self.mag_size_changed_callback(value)
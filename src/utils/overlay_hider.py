@@ -0,0 +1,14 @@
+class OverlayHider:
+    def __init__(self):
+        self._opacity = {}
+        
+    def hide(self, windows):
+        for window in windows:
+            if window.isVisible() and window not in self._opacity:
+                self._opacity[window] = window.windowOpacity()
+                window.setWindowOpacity(0.0)
+                
+    def restore(self):
+        for window, opacity in self._opacity.items():
+            window.setWindowOpacity(opacity)
+        self._opacity.clear()
@@ -1,28 +1,195 @@
 import os
 from datetime import datetime
 from PyQt6.QtWidgets import QApplication
-from PyQt6.QtCore import QRect
-from PyQt6.QtGui import QPixmap, QScreen
+from PyQt6.QtCore import Qt, QObject, QPoint, QRect, QRunnable, QThreadPool, QTimer, pyqtSignal
+from PyQt6.QtGui import QImage, QPainter, QPixmap, QScreen
+
+from src.drawing.shapes import draw_elements
+from src.utils.overlay_hider import OverlayHider
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+CAPTURE_CANVAS = "canvas"
+CAPTURE_DESKTOP = "desktop"
+
+class _SaveSignals(QObject):
+    finished = pyqtSignal(str, bool)
+
+class _SaveTask(QRunnable):
+    def __init__(self, image: QImage, filepath: str, signals: _SaveSignals):
+        super().__init__()
+        self.image = image
+        self.filepath = filepath
+        self.signals = signals
+        
+    def run(self):
+        ok = self.image.save(self.filepath)
+        self.signals.finished.emit(self.filepath, ok)
+
+class _CompositeTask(QRunnable):
+    def __init__(self, filepath, signals, size, shots, annotations, annotation_rect):
+        super().__init__()
+        self.filepath = filepath
+        self.signals = signals
+        self.size = size
+        self.shots = shots
+        self.annotations = annotations
+        self.annotation_rect = annotation_rect
+        
+    def run(self):
+        if PIL_AVAILABLE:
+            ok = self._compose_pil()
+        else:
+            ok = self._compose_qt()
+        self.signals.finished.emit(self.filepath, ok)
+        
+    def _compose_pil(self) -> bool:
+        result = Image.new("RGBA", (self.size.width(), self.size.height()), (0, 0, 0, 255))
+        for image, rect in self.shots:
+            result.paste(_to_pil(image, rect), (rect.x(), rect.y()))
+        result.alpha_composite(_to_pil(self.annotations, self.annotation_rect),
+                               (self.annotation_rect.x(), self.annotation_rect.y()))
+        try:
+            result.convert("RGB").save(self.filepath, "PNG")
+        except OSError:
+            return False
+        return True
+        
+    def _compose_qt(self) -> bool:
+        result = QImage(self.size, QImage.Format.Format_RGB32)
+        result.fill(Qt.GlobalColor.black)
+        painter = QPainter(result)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        for image, rect in self.shots:
+            painter.drawImage(rect, image)
+        painter.drawImage(self.annotation_rect, self.annotations)
+        painter.end()
+        return result.save(self.filepath)
+
+def _to_pil(image: QImage, rect: QRect):
+    image = image.convertToFormat(QImage.Format.Format_RGBA8888)
+    bits = image.constBits()
+    bits.setsize(image.sizeInBytes())
+    result = Image.frombuffer("RGBA", (image.width(), image.height()), bytes(bits),
+                              "raw", "RGBA", image.bytesPerLine(), 1)
+    if result.size != (rect.width(), rect.height()):
+        result = result.resize((rect.width(), rect.height()), Image.Resampling.LANCZOS)
+    return result
 
 class ScreenshotManager:
-    def __init__(self, save_path=None):
+    def __init__(self, save_path=None, capture_mode=CAPTURE_CANVAS):
         if save_path is None:
             save_path = os.path.expanduser("~/Desktop/Screenshots")
         self.save_path = save_path
-        self._ensure_directory()
+        self.capture_mode = capture_mode
+        self.hide_delay = 60
+        self.saved_callback = None
+        self._pending = set()
+        self._scheduled = []
+        self._hider = OverlayHider()
+        self._signals = _SaveSignals()
+        self._signals.finished.connect(self._on_saved)
+        self._pool = QThreadPool()
+        self._pool.setMaxThreadCount(1)
         
     def _ensure_directory(self):
         if not os.path.exists(self.save_path):
             os.makedirs(self.save_path)
             
-    def save_screenshot(self, canvas, filename=None):
+    def set_saved_callback(self, callback):
+        self.saved_callback = callback
+        
+    def set_capture_mode(self, mode):
+        self.capture_mode = mode
+        
+    def save_screenshot(self, canvas, filename=None, overlays=()):
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         if filename is None:
             filename = f"screenshot_{timestamp}.png"
             
-        filepath = os.path.join(self.save_path, filename)
-        
-        pixmap = canvas.grab()
-        pixmap.save(filepath)
+        self._ensure_directory()
+        filepath = self._unique_path(os.path.join(self.save_path, filename))
+        self._pending.add(filepath)
         
+        if self.capture_mode == CAPTURE_DESKTOP:
+            self._schedule_desktop_capture(canvas, filepath, overlays)
+        else:
+            image = canvas.grab().toImage()
+            self._pool.start(_SaveTask(image, filepath, self._signals))
+            
         return filepath
+        
+    def _schedule_desktop_capture(self, canvas, filepath, overlays):
+        self._hider.hide([canvas, *overlays])
+        capture = (canvas, filepath)
+        self._scheduled.append(capture)
+        QTimer.singleShot(self.hide_delay, lambda: self._capture_desktop(capture))
+        
+    def _capture_desktop(self, capture):
+        if capture not in self._scheduled:
+            return
+        self._scheduled.remove(capture)
+        canvas, filepath = capture
+        
+        screens = QApplication.screens()
+        scale = max(screen.devicePixelRatio() for screen in screens)
+        virtual = QRect()
+        for screen in screens:
+            virtual = virtual.united(screen.geometry())
+        shots = []
+        for screen in screens:
+            image = screen.grabWindow(0).toImage()
+            if not image.isNull():
+                shots.append((image, self._device_rect(screen.geometry(), virtual.topLeft(), scale)))
+                
+        if not self._scheduled:
+            self._hider.restore()
+            
+        annotation_rect = self._device_rect(QRect(canvas.mapToGlobal(QPoint(0, 0)), canvas.size()),
+                                            virtual.topLeft(), scale)
+        if canvas.devicePixelRatioF() == scale:
+            annotations = canvas.annotation_image()
+        else:
+            annotations = self._render_annotations(canvas, annotation_rect.size(), scale)
+        self._pool.start(_CompositeTask(filepath, self._signals, virtual.size() * scale,
+                                        shots, annotations, annotation_rect))
+        
+    def _render_annotations(self, canvas, size, scale) -> QImage:
+        image = QImage(size, QImage.Format.Format_ARGB32_Premultiplied)
+        image.setDevicePixelRatio(scale)
+        image.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        draw_elements(painter, canvas.drawing_elements)
+        painter.end()
+        return image
+        
+    def _device_rect(self, rect, origin, scale) -> QRect:
+        return QRect(round((rect.x() - origin.x()) * scale), round((rect.y() - origin.y()) * scale),
+                     round(rect.width() * scale), round(rect.height() * scale))
+        
+    def _unique_path(self, filepath):
+        base, ext = os.path.splitext(filepath)
+        candidate = filepath
+        index = 1
+        while candidate in self._pending or os.path.exists(candidate):
+            candidate = f"{base}_{index}{ext}"
+            index += 1
+        return candidate
+        
+    def _on_saved(self, filepath, ok):
+        self._pending.discard(filepath)
+        if self.saved_callback:
+            self.saved_callback(filepath, ok)
+            
+    def has_pending(self) -> bool:
+        return bool(self._pending)
+        
+    def wait_for_pending(self, msecs=-1) -> bool:
+        while self._scheduled:
+            self._capture_desktop(self._scheduled[0])
+        return self._pool.waitForDone(msecs)
@@ -0,0 +1,53 @@
+import getpass
+from PyQt6.QtNetwork import QLocalServer, QLocalSocket
+
+MESSAGE_SHOW = b"show"
+MESSAGE_QUIT = b"quit"
+
+class SingleInstance:
+    def __init__(self, name="electronic-pointer"):
+        try:
+            user = getpass.getuser()
+        except Exception:
+            user = "default"
+        self.server_name = f"{name}-{user}"
+        self.timeout = 200
+        self.message_callback = None
+        self._server = None
+        
+    def set_message_callback(self, callback):
+        self.message_callback = callback
+        
+    def send(self, message=MESSAGE_SHOW) -> bool:
+        socket = QLocalSocket()
+        socket.connectToServer(self.server_name)
+        if not socket.waitForConnected(self.timeout):
+            return False
+        socket.write(message)
+        socket.waitForBytesWritten(self.timeout)
+        socket.disconnectFromServer()
+        return True
+        
+    def listen(self) -> bool:
+        QLocalServer.removeServer(self.server_name)
+        self._server = QLocalServer()
+        self._server.newConnection.connect(self._on_new_connection)
+        return self._server.listen(self.server_name)
+        
+    def close(self):
+        if self._server:
+            self._server.close()
+            self._server = None
+            
+    def _on_new_connection(self):
+        while self._server and self._server.hasPendingConnections():
+            socket = self._server.nextPendingConnection()
+            socket.readyRead.connect(lambda socket=socket: self._on_ready_read(socket))
+            socket.disconnected.connect(socket.deleteLater)
+            if socket.bytesAvailable():
+                self._on_ready_read(socket)
+                
+    def _on_ready_read(self, socket):
+        message = bytes(socket.readAll()).strip()
+        if self.message_callback:
+            self.message_callback(message)
@@ -0,0 +1,57 @@
+import os
+import time
+from PyQt6.QtCore import QObject, QEvent, QTimer
+
+def process_start_time():
+    try:
+        elapsed = time.time() - _process_creation_time()
+    except (ImportError, OSError, ValueError, IndexError):
+        return None
+    return time.perf_counter() - elapsed
+
+def _process_creation_time() -> float:
+    if os.name == "nt":
+        import win32api
+        import win32process
+        return win32process.GetProcessTimes(win32api.GetCurrentProcess())["CreationTime"].timestamp()
+    with open("/proc/self/stat") as stat:
+        start_ticks = int(stat.read().rsplit(")", 1)[1].split()[19])
+    with open("/proc/uptime") as uptime:
+        boot_elapsed = float(uptime.read().split()[0])
+    return time.time() - boot_elapsed + start_ticks / os.sysconf("SC_CLK_TCK")
+
+class StartupProfile(QObject):
+    def __init__(self, enabled=False, start=None):
+        super().__init__()
+        self.enabled = enabled
+        self.start = time.perf_counter() if start is None else start
+        self.marks = []
+        self._watched = None
+        
+    def mark(self, name, moment=None):
+        if self.enabled:
+            self.marks.append((name, time.perf_counter() if moment is None else moment))
+            
+    def watch_first_paint(self, widget):
+        if self.enabled:
+            self._watched = widget
+            widget.installEventFilter(self)
+            
+    def eventFilter(self, obj, event):
+        if obj is self._watched and event.type() == QEvent.Type.Paint:
+            obj.removeEventFilter(self)
+            self._watched = None
+            QTimer.singleShot(0, self._on_first_paint)
+        return False
+        
+    def _on_first_paint(self):
+        self.mark("首帧绘制完成")
+        print(self.report())
+        
+    def report(self) -> str:
+        lines = ["启动耗时分析:"]
+        previous = self.start
+        for name, moment in self.marks:
+            lines.append(f"  {name}: +{(moment - previous) * 1000:.1f} ms (累计 {(moment - self.start) * 1000:.1f} ms)")
+            previous = moment
+        return "\n".join(lines)
@@ -2,9 +2,19 @@ import unittest
 import sys
 import os
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
 
-from PyQt6.QtCore import QPoint
-from src.drawing.shapes import FreePath, Line, Rectangle, Circle, TextElement, EraserStroke
+from PyQt6.QtCore import Qt, QEvent, QPoint, QPointF, QRect
+from PyQt6.QtGui import QImage, QPainter, QMouseEvent
+from PyQt6.QtWidgets import QApplication
+from src.drawing.canvas import Canvas
+from src.drawing.shapes import FreePath, Line, Rectangle, Circle, TextElement, EraserStroke, draw_elements
+from src.drawing.spatial_index import SpatialIndex
+from src.drawing.styles import stroke_style, text_style
+from src.drawing.point_buffer import PointBuffer
+from src.drawing.simplify import simplify_points, StrokeSimplifier
+from src.tools.base_tool import BaseTool
+from src.tools.eraser_tool import EraserTool
 
 
 class TestFreePath(unittest.TestCase):
@@ -25,6 +35,94 @@ class TestFreePath(unittest.TestCase):
         self.assertEqual(len(path.points), 1)
         self.assertEqual(path.color, "#00FF00")
         self.assertEqual(path.width, 5)
+        
+    def test_points_stored_compactly(self):
+        points = [QPoint(i, i * 2) for i in range(1000)]
+        path = FreePath(points, "#FF0000", 3)
+        self.assertIsInstance(path.points, PointBuffer)
+        self.assertEqual(path.points[999], QPoint(999, 1998))
+        self.assertEqual(len(path.points.coords()), 2000)
+
+
+class TestPointBuffer(unittest.TestCase):
+    def test_append_and_index(self):
+        buffer = PointBuffer()
+        buffer.append(QPoint(1, 2))
+        buffer.append_xy(3, 4)
+        self.assertEqual(len(buffer), 2)
+        self.assertEqual(buffer[0], QPoint(1, 2))
+        self.assertEqual(buffer[-1], QPoint(3, 4))
+        self.assertEqual(list(buffer), [QPoint(1, 2), QPoint(3, 4)])
+        
+    def test_index_out_of_range(self):
+        with self.assertRaises(IndexError):
+            PointBuffer([QPoint(0, 0)])[1]
+            
+    def test_copy_is_independent(self):
+        buffer = PointBuffer([QPoint(0, 0)])
+        copied = buffer.copy()
+        copied.append_xy(5, 5)
+        self.assertEqual(len(buffer), 1)
+        self.assertEqual(len(copied), 2)
+        
+    def test_bounds(self):
+        buffer = PointBuffer([QPoint(5, -3), QPoint(-2, 8), QPoint(1, 1)])
+        self.assertEqual(buffer.bounds(), (-2, -3, 5, 8))
+        self.assertIsNone(PointBuffer().bounds())
+        
+    def test_to_polygon(self):
+        buffer = PointBuffer([QPoint(1, 2), QPoint(30, 40)])
+        polygon = buffer.to_polygon()
+        self.assertEqual(polygon.size(), 2)
+        self.assertEqual(polygon.point(1), QPoint(30, 40))
+
+
+class TestSimplify(unittest.TestCase):
+    def test_collinear_points_removed(self):
+        points = PointBuffer([QPoint(i, 0) for i in range(100)])
+        simplified = simplify_points(points, 0.5)
+        self.assertEqual(list(simplified), [QPoint(0, 0), QPoint(99, 0)])
+        
+    def test_corner_kept(self):
+        points = PointBuffer([QPoint(i, 0) for i in range(50)] + [QPoint(49, i) for i in range(1, 50)])
+        simplified = simplify_points(points, 0.5)
+        self.assertEqual(list(simplified), [QPoint(0, 0), QPoint(49, 0), QPoint(49, 49)])
+        
+    def test_backtracking_stroke_kept(self):
+        points = PointBuffer([QPoint(0, 0), QPoint(50, 0), QPoint(20, 0)])
+        simplified = simplify_points(points, 0.5)
+        self.assertEqual(len(simplified), 3)
+        
+    def test_repeated_samples_dropped(self):
+        points = PointBuffer([QPoint(5, 5), QPoint(5, 5), QPoint(5, 5)])
+        self.assertEqual(list(simplify_points(points, 0.5)), [QPoint(5, 5)])
+        
+    def test_zero_tolerance_keeps_points(self):
+        points = PointBuffer([QPoint(0, 0), QPoint(1, 0), QPoint(2, 0)])
+        self.assertEqual(simplify_points(points, 0), points)
+        
+    def test_stroke_simplifier_matches_short_stroke(self):
+        points = PointBuffer([QPoint(i, (i * i) % 7) for i in range(100)])
+        simplifier = StrokeSimplifier(0.5)
+        simplifier.feed(points)
+        self.assertEqual(simplifier.finish(points), simplify_points(points, 0.5))
+        
+    def test_stroke_simplifier_incremental_chunks(self):
+        points = PointBuffer()
+        simplifier = StrokeSimplifier(0.5, chunk_size=64)
+        for i in range(300):
+            points.append(QPoint(i, 0))
+            simplifier.feed(points)
+        for i in range(1, 300):
+            points.append(QPoint(299, i))
+            simplifier.feed(points)
+        simplified = list(simplifier.finish(points))
+        self.assertEqual(simplified[0], QPoint(0, 0))
+        self.assertEqual(simplified[-1], QPoint(299, 299))
+        self.assertIn(QPoint(299, 0), simplified)
+        self.assertLessEqual(len(simplified), 600 // 64 + 3)
+        self.assertTrue(all(p.x() == 299 or p.y() == 0 for p in simplified))
+        self.assertEqual(len(simplified), len(set((p.x(), p.y()) for p in simplified)))
 
 
 class TestLine(unittest.TestCase):
@@ -125,5 +223,388 @@ class TestEraserStroke(unittest.TestCase):
         self.assertEqual(eraser.size, 20)
 
 
+class TestEraserTool(unittest.TestCase):
+    def setUp(self):
+        self.tool = EraserTool(None, 20)
+        
+    def test_long_diagonal_segment_not_hit_by_bounding_box(self):
+        path = FreePath([QPoint(1, 1), QPoint(499, 499)], "#FF0000", 3)
+        self.assertFalse(self.tool._intersects(path, QRect(440, 40, 20, 20)))
+        self.assertTrue(self.tool._intersects(path, QRect(240, 240, 20, 20)))
+        
+    def test_long_diagonal_line_not_hit_by_bounding_box(self):
+        line = Line(QPoint(1, 1), QPoint(499, 499), "#FF0000", 3)
+        self.assertFalse(self.tool._intersects(line, QRect(440, 40, 20, 20)))
+        self.assertTrue(self.tool._intersects(line, QRect(240, 240, 20, 20)))
+        
+    def test_pen_width_counts_as_ink(self):
+        path = FreePath([QPoint(0, 100), QPoint(200, 100)], "#FF0000", 10)
+        self.assertTrue(self.tool._intersects(path, QRect(50, 76, 20, 20)))
+        self.assertFalse(self.tool._intersects(path, QRect(50, 70, 20, 20)))
+
+
+class TestBoundingRect(unittest.TestCase):
+    def test_free_path_includes_pen_width(self):
+        path = FreePath([QPoint(10, 10), QPoint(50, 30)], "#FF0000", 4)
+        rect = path.bounding_rect()
+        self.assertTrue(rect.contains(QPoint(10 - 2, 10 - 2)))
+        self.assertTrue(rect.contains(QPoint(50 + 2, 30 + 2)))
+        
+    def test_line_reversed(self):
+        line = Line(QPoint(100, 100), QPoint(0, 0), "#FF0000", 3)
+        rect = line.bounding_rect()
+        self.assertTrue(rect.contains(QPoint(0, 0)))
+        self.assertTrue(rect.contains(QPoint(100, 100)))
+        
+    def test_circle(self):
+        circle = Circle(QPoint(50, 50), 20, "#FF0000", 3)
+        rect = circle.bounding_rect()
+        self.assertTrue(rect.contains(QPoint(30, 50)))
+        self.assertTrue(rect.contains(QPoint(70, 50)))
+        self.assertFalse(rect.contains(QPoint(80, 50)))
+        
+    def test_eraser_stroke_is_empty(self):
+        eraser = EraserStroke([QPoint(0, 0), QPoint(10, 10)], 20)
+        self.assertTrue(eraser.bounding_rect().isEmpty())
+
+
+class TestPreparedGeometry(unittest.TestCase):
+    def test_prepared_objects_are_reused(self):
+        path = FreePath([QPoint(0, 0), QPoint(10, 10)], "#FF0000", 3)
+        self.assertIs(path.prepared(), path.prepared())
+        
+    def test_mutation_invalidates(self):
+        line = Line(QPoint(0, 0), QPoint(10, 10), "#FF0000", 3)
+        pen = line.style.pen
+        bounds = line.bounding_rect()
+        line.width = 9
+        self.assertEqual(line.style.pen.width(), 9)
+        self.assertNotEqual(line.bounding_rect(), bounds)
+        self.assertEqual(pen.width(), 3)
+
+
+class TestStyles(unittest.TestCase):
+    def test_styles_are_interned(self):
+        self.assertIs(stroke_style("#FF0000", 3), stroke_style("#FF0000", 3))
+        self.assertIsNot(stroke_style("#FF0000", 3), stroke_style("#FF0000", 4))
+        self.assertIs(text_style("#FF0000", 16), text_style("#FF0000", 16))
+        
+    def test_elements_share_style(self):
+        a = FreePath([QPoint(0, 0), QPoint(10, 10)], "#FF0000", 3)
+        b = FreePath([QPoint(5, 5), QPoint(20, 20)], "#FF0000", 3)
+        self.assertIs(a.style, b.style)
+        self.assertIs(a.style.pen, b.style.pen)
+        
+    def test_attribute_change_switches_style(self):
+        a = Rectangle(QPoint(0, 0), QPoint(10, 10), "#FF0000", 3)
+        b = Rectangle(QPoint(0, 0), QPoint(10, 10), "#FF0000", 3)
+        b.color = "#00FF00"
+        self.assertEqual(a.color, "#FF0000")
+        self.assertEqual(b.color, "#00FF00")
+        self.assertIs(b.style, stroke_style("#00FF00", 3))
+        
+    def test_opacity_applied(self):
+        path = FreePath([QPoint(0, 0), QPoint(10, 10)], "#FF0000", 3, opacity=128)
+        self.assertEqual(path.style.pen.color().alpha(), 128)
+        self.assertEqual(FreePath([QPoint(0, 0)], "#FF0000", 3).style.pen.color().alpha(), 255)
+        text = TextElement(QPoint(0, 0), "a", "#FF0000", opacity=64)
+        self.assertEqual(text.style.pen.color().alpha(), 64)
+
+
+class TestSpatialIndex(unittest.TestCase):
+    def setUp(self):
+        self.index = SpatialIndex(cell_size=32)
+        
+    def test_query_returns_nearby_segments_only(self):
+        path = FreePath([QPoint(0, 0), QPoint(10, 0), QPoint(300, 0), QPoint(300, 300)], "#FF0000", 3)
+        self.index.insert(path)
+        candidates = self.index.query(QRect(295, 250, 10, 10))
+        self.assertEqual(list(candidates), [path])
+        self.assertEqual({i for span in candidates[path] for i in span}, {2})
+        
+    def test_diagonal_indexes_only_crossed_cells(self):
+        path = FreePath([QPoint(0, 0), QPoint(320, 320)], "#FF0000", 1)
+        self.index.insert(path)
+        self.assertIn(path, self.index.query(QRect(160, 160, 4, 4)))
+        self.assertEqual(self.index.query(QRect(260, 20, 4, 4)), {})
+        self.assertEqual(self.index.query(QRect(20, 260, 4, 4)), {})
+        
+    def test_consecutive_segments_share_a_range(self):
+        path = FreePath([QPoint(x, 5) for x in range(0, 30, 3)], "#FF0000", 1)
+        self.index.insert(path)
+        self.assertEqual(list(self.index._cells[(0, 0)][path]), [0, 9])
+        
+    def test_query_elements_sorted_by_z_order(self):
+        a = Rectangle(QPoint(0, 0), QPoint(20, 20), "#FF0000", 3)
+        b = Line(QPoint(0, 0), QPoint(20, 20), "#FF0000", 3)
+        c = FreePath([QPoint(0, 10), QPoint(20, 10)], "#FF0000", 3)
+        for element in (a, b, c):
+            self.index.insert(element)
+        self.index.remove(a)
+        self.index.insert(a)
+        self.assertEqual(self.index.query_elements(QRect(5, 5, 5, 5)), [a, b, c])
+        replacement = Rectangle(QPoint(0, 0), QPoint(20, 20), "#00FF00", 3)
+        self.index.remove(b)
+        self.index.insert(replacement, z=b._z_order)
+        self.assertEqual(self.index.query_elements(QRect(5, 5, 5, 5)), [a, replacement, c])
+        
+    def test_query_misses_far_elements(self):
+        rect = Rectangle(QPoint(0, 0), QPoint(20, 20), "#FF0000", 3)
+        self.index.insert(rect)
+        self.assertEqual(self.index.query(QRect(500, 500, 10, 10)), {})
+        self.assertIn(rect, self.index.query(QRect(10, 10, 5, 5)))
+        
+    def test_remove(self):
+        line = Line(QPoint(0, 0), QPoint(100, 100), "#FF0000", 3)
+        self.index.insert(line)
+        self.index.remove(line)
+        self.assertEqual(len(self.index), 0)
+        self.assertEqual(self.index.query(QRect(0, 0, 100, 100)), {})
+        
+    def test_eraser_stroke_not_indexed(self):
+        self.index.insert(EraserStroke([QPoint(0, 0), QPoint(10, 10)], 20))
+        self.assertEqual(self.index.query(QRect(0, 0, 20, 20)), {})
+
+
+class TestDrawElements(unittest.TestCase):
+    def render(self, elements, batched):
+        image = QImage(120, 120, QImage.Format.Format_ARGB32_Premultiplied)
+        image.fill(0)
+        painter = QPainter(image)
+        if batched:
+            draw_elements(painter, elements)
+        else:
+            for element in elements:
+                element.draw(painter)
+        painter.end()
+        return image
+        
+    def test_batch_keys_group_compatible_elements(self):
+        a = Rectangle(QPoint(0, 0), QPoint(10, 10), "#FF0000", 3)
+        b = Rectangle(QPoint(5, 5), QPoint(20, 20), "#FF0000", 3)
+        self.assertEqual(a.batch_key(), b.batch_key())
+        self.assertNotEqual(a.batch_key(), Rectangle(QPoint(0, 0), QPoint(1, 1), "#0000FF", 3).batch_key())
+        self.assertIsNone(Rectangle(QPoint(0, 0), QPoint(1, 1), "#FF0000", 3, "#00FF00").batch_key())
+        self.assertIsNone(TextElement(QPoint(0, 0), "a", "#FF0000").batch_key())
+        
+    def test_batched_render_matches_sequential(self):
+        elements = [
+            Rectangle(QPoint(10, 10), QPoint(60, 60), "#FF0000", 3),
+            Rectangle(QPoint(30, 30), QPoint(90, 90), "#FF0000", 3),
+            Rectangle(QPoint(20, 20), QPoint(70, 70), "#0000FF", 5, "#0000FF"),
+            Rectangle(QPoint(40, 40), QPoint(100, 100), "#FF0000", 3),
+            FreePath([QPoint(0, 50), QPoint(60, 55), QPoint(110, 40)], "#00FF00", 4),
+            FreePath([QPoint(50, 0), QPoint(55, 110)], "#00FF00", 4),
+            Line(QPoint(0, 0), QPoint(110, 110), "#000000", 2),
+            Circle(QPoint(60, 60), 30, "#000000", 2),
+            Circle(QPoint(60, 60), 15, "#000000", 2),
+        ]
+        self.assertEqual(self.render(elements, True), self.render(elements, False))
+
+
+class TestCanvasCache(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+        
+    def setUp(self):
+        self.canvas = Canvas()
+        self.canvas.resize(200, 200)
+        
+    def fresh_render(self):
+        image = QImage(self.canvas.annotation_image().size(), QImage.Format.Format_ARGB32_Premultiplied)
+        image.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        draw_elements(painter, self.canvas.drawing_elements)
+        painter.end()
+        return image
+        
+    def assertCacheFresh(self):
+        self.assertEqual(self.canvas.annotation_image(), self.fresh_render())
+        
+    def draw(self, element):
+        self.canvas.add_element(element)
+        self.canvas.save_state()
+        
+    def test_cache_matches_fresh_render(self):
+        self.assertCacheFresh()
+        self.draw(FreePath([QPoint(10, 10), QPoint(100, 60), QPoint(180, 20)], "#FF0000", 6))
+        self.draw(Rectangle(QPoint(40, 40), QPoint(150, 150), "#0000FF", 3))
+        self.draw(Circle(QPoint(100, 100), 50, "#00FF00", 4))
+        self.draw(Line(QPoint(0, 190), QPoint(190, 0), "#000000", 2))
+        self.assertCacheFresh()
+        
+        eraser = EraserTool(self.canvas, 20)
+        eraser.mouse_press(QPoint(100, 150))
+        eraser.mouse_release(QPoint(100, 150))
+        self.canvas.save_state()
+        self.assertEqual([type(element) for element in self.canvas.drawing_elements],
+                         [FreePath, Line, EraserStroke])
+        self.assertCacheFresh()
+        
+        self.canvas.undo()
+        self.assertCacheFresh()
+        self.canvas.undo()
+        self.assertCacheFresh()
+        self.canvas.redo()
+        self.assertCacheFresh()
+        
+        self.canvas.clear_canvas()
+        self.assertCacheFresh()
+        self.canvas.undo()
+        self.assertCacheFresh()
+
+
+class TestCanvasHistory(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+        
+    def setUp(self):
+        self.canvas = Canvas()
+        self.canvas.resize(200, 200)
+        
+    def assertInSync(self, expected):
+        canvas = self.canvas
+        self.assertEqual(canvas.drawing_elements, expected)
+        self.assertEqual(canvas.history_manager.current_state, expected)
+        self.assertEqual(len(canvas.spatial_index), len(expected))
+        for element in expected:
+            self.assertIn(element, canvas.spatial_index)
+        self.assertEqual(canvas.spatial_index.query_elements(QRect(0, 0, 200, 200)),
+                         [element for element in expected if not isinstance(element, EraserStroke)])
+        
+    def test_erase_undo_redo_stay_in_sync(self):
+        path = FreePath([QPoint(10, 100), QPoint(190, 100)], "#FF0000", 4)
+        line = Line(QPoint(100, 10), QPoint(100, 190), "#0000FF", 2)
+        rect = Rectangle(QPoint(150, 150), QPoint(180, 180), "#00FF00", 2)
+        for element in (path, line, rect):
+            self.canvas.add_element(element)
+            self.canvas.save_state()
+        self.assertInSync([path, line, rect])
+        
+        eraser = EraserTool(self.canvas, 10)
+        eraser.mouse_press(QPoint(50, 100))
+        eraser.mouse_move(QPoint(100, 60))
+        eraser.mouse_release(QPoint(100, 60))
+        self.canvas.save_state()
+        stroke = self.canvas.drawing_elements[-1]
+        self.assertIsInstance(stroke, EraserStroke)
+        self.assertInSync([rect, stroke])
+        
+        self.canvas.undo()
+        self.assertInSync([path, line, rect])
+        self.canvas.redo()
+        self.assertInSync([rect, stroke])
+        self.canvas.undo()
+        self.canvas.undo()
+        self.assertInSync([path, line])
+        self.canvas.redo()
+        self.canvas.redo()
+        self.assertInSync([rect, stroke])
+        
+    def test_text_edit_undo(self):
+        before = Line(QPoint(0, 0), QPoint(100, 100), "#000000", 2)
+        text = TextElement(QPoint(20, 50), "旧文字", "#FF0000")
+        after = Rectangle(QPoint(10, 10), QPoint(90, 90), "#0000FF", 2)
+        for element in (before, text, after):
+            self.canvas.add_element(element)
+        self.canvas.save_state()
+        
+        edited = TextElement(QPoint(20, 50), "新文字", "#FF0000")
+        self.canvas.replace_element(text, edited)
+        self.canvas.save_state()
+        self.assertInSync([before, edited, after])
+        
+        self.canvas.undo()
+        self.assertInSync([before, text, after])
+        self.assertEqual(self.canvas.drawing_elements[1].text, "旧文字")
+        self.canvas.redo()
+        self.assertInSync([before, edited, after])
+
+
+class RecordingTool(BaseTool):
+    def __init__(self, canvas, hover_tracking=False):
+        super().__init__(canvas)
+        self.hover_tracking = hover_tracking
+        self.events = []
+        
+    def mouse_press(self, pos: QPoint):
+        self.events.append(("press", pos))
+        
+    def mouse_move(self, pos: QPoint):
+        self.events.append(("move", pos))
+        
+    def mouse_move_batch(self, samples):
+        self.events.append(("batch", samples))
+        
+    def mouse_release(self, pos: QPoint):
+        self.events.append(("release", pos))
+
+
+class TestCanvasInput(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.app = QApplication.instance() or QApplication([])
+        
+    def setUp(self):
+        self.canvas = Canvas()
+        self.canvas.resize(200, 200)
+        
+    def send(self, event_type, pos, buttons):
+        button = Qt.MouseButton.NoButton if event_type == QEvent.Type.MouseMove else Qt.MouseButton.LeftButton
+        event = QMouseEvent(event_type, QPointF(pos), QPointF(pos), button, buttons,
+                            Qt.KeyboardModifier.NoModifier)
+        if event_type == QEvent.Type.MouseButtonPress:
+            self.canvas.mousePressEvent(event)
+        elif event_type == QEvent.Type.MouseMove:
+            self.canvas.mouseMoveEvent(event)
+        else:
+            self.canvas.mouseReleaseEvent(event)
+            
+    def test_moves_are_delivered_as_one_batch(self):
+        tool = RecordingTool(self.canvas)
+        self.canvas.current_tool = tool
+        left = Qt.MouseButton.LeftButton
+        self.send(QEvent.Type.MouseButtonPress, QPoint(0, 0), left)
+        for i in range(1, 4):
+            self.send(QEvent.Type.MouseMove, QPoint(i, i), left)
+        self.assertEqual(tool.events, [("press", QPoint(0, 0))])
+        self.assertTrue(self.canvas._input_timer.isActive())
+        self.send(QEvent.Type.MouseButtonRelease, QPoint(3, 3), Qt.MouseButton.NoButton)
+        self.assertEqual([name for name, _ in tool.events], ["press", "batch", "release"])
+        samples = tool.events[1][1]
+        self.assertEqual([pos for pos, _ in samples], [QPoint(1, 1), QPoint(2, 2), QPoint(3, 3)])
+        self.assertTrue(all(isinstance(timestamp, int) for _, timestamp in samples))
+        
+    def test_tool_change_flushes_pending_samples(self):
+        tool = RecordingTool(self.canvas)
+        self.canvas.current_tool = tool
+        self.send(QEvent.Type.MouseMove, QPoint(5, 5), Qt.MouseButton.LeftButton)
+        self.canvas.current_tool = RecordingTool(self.canvas)
+        self.assertEqual([(name, [pos for pos, _ in samples]) for name, samples in tool.events],
+                         [("batch", [QPoint(5, 5)])])
+        
+    def test_hover_tracking_follows_tool(self):
+        self.canvas.current_tool = RecordingTool(self.canvas)
+        self.assertFalse(self.canvas.hasMouseTracking())
+        hover = RecordingTool(self.canvas, hover_tracking=True)
+        self.canvas.current_tool = hover
+        self.assertTrue(self.canvas.hasMouseTracking())
+        self.send(QEvent.Type.MouseMove, QPoint(5, 5), Qt.MouseButton.NoButton)
+        self.canvas.current_tool = RecordingTool(self.canvas)
+        self.assertFalse(self.canvas.hasMouseTracking())
+        self.assertEqual([(name, [pos for pos, _ in samples]) for name, samples in hover.events],
+                         [("batch", [QPoint(5, 5)])])
+        
+    def test_hover_moves_dropped_without_tracking(self):
+        tool = RecordingTool(self.canvas)
+        self.canvas.current_tool = tool
+        self.send(QEvent.Type.MouseMove, QPoint(5, 5), Qt.MouseButton.NoButton)
+        self.canvas.current_tool = None
+        self.assertEqual(tool.events, [])
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -1,10 +1,16 @@
 import unittest
 import sys
 import os
+import tempfile
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from src.managers.history_manager import HistoryManager
+from src.managers.history_manager import HistoryManager, HistoryEntry, ADD, REMOVE
 from src.managers.style_manager import StyleManager, Style
+from src.utils.screenshot import ScreenshotManager
+from src.tools.registry import ToolRegistry
+from src.tools.base_tool import BaseTool
+from src.tools.eraser_tool import EraserTool
+from PyQt6.QtCore import QPoint, QRect
 
 
 class TestHistoryManager(unittest.TestCase):
@@ -84,6 +90,43 @@ class TestHistoryManager(unittest.TestCase):
         original[0] = ['modified']
         state = self.manager.undo()
         self.assertEqual(state, [['a']])
+        
+    def test_entries_store_only_changes(self):
+        elements = [object() for _ in range(100)]
+        self.manager.save_state(elements)
+        self.manager.save_state(elements + ['new'])
+        self.assertEqual(self.manager.undo_stack[-1].ops, [(ADD, 100, 'new')])
+        
+    def test_elements_are_shared_not_copied(self):
+        element = ['a']
+        self.manager.save_state([element])
+        self.manager.save_state([])
+        state = self.manager.undo()
+        self.assertIs(state[0], element)
+        
+    def test_record_and_undo_change(self):
+        elements = ['a', 'b']
+        self.manager.save_state(elements)
+        self.manager.record([(REMOVE, 0, 'a'), (ADD, 1, 'c')])
+        self.assertEqual(self.manager.current_state, ['b', 'c'])
+        self.manager.undo_change()
+        self.assertEqual(self.manager.current_state, ['a', 'b'])
+        self.manager.redo_change()
+        self.assertEqual(self.manager.current_state, ['b', 'c'])
+        
+    def test_undo_change_empty_stack(self):
+        self.assertIsNone(self.manager.undo_change())
+        self.assertIsNone(self.manager.redo_change())
+
+
+class TestHistoryEntry(unittest.TestCase):
+    def test_apply_and_inverse(self):
+        elements = ['a', 'b', 'c']
+        entry = HistoryEntry([(REMOVE, 1, 'b'), (ADD, 2, 'd')])
+        entry.apply(elements)
+        self.assertEqual(elements, ['a', 'c', 'd'])
+        entry.inverse().apply(elements)
+        self.assertEqual(elements, ['a', 'b', 'c'])
 
 
 class TestStyle(unittest.TestCase):
@@ -155,5 +198,70 @@ class TestStyleManager(unittest.TestCase):
         self.assertLessEqual(len(self.manager.recent_colors), 10)
 
 
+class TestScreenshotManager(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.manager = ScreenshotManager(self.directory.name)
+        
+    def tearDown(self):
+        self.manager.wait_for_pending()
+        self.directory.cleanup()
+        
+    def test_unique_path_skips_existing_file(self):
+        path = os.path.join(self.directory.name, "shot.png")
+        open(path, "wb").close()
+        self.assertEqual(self.manager._unique_path(path), os.path.join(self.directory.name, "shot_1.png"))
+        
+    def test_unique_path_skips_pending_save(self):
+        path = os.path.join(self.directory.name, "shot.png")
+        self.manager._pending.add(path)
+        self.assertEqual(self.manager._unique_path(path), os.path.join(self.directory.name, "shot_1.png"))
+        
+    def test_device_rect_scales_from_virtual_origin(self):
+        rect = self.manager._device_rect(QRect(1920, 0, 1280, 720), QPoint(-1280, 0), 1.5)
+        self.assertEqual(rect, QRect(4800, 0, 1920, 1080))
+        
+    def test_no_pending_initially(self):
+        self.assertFalse(self.manager.has_pending())
+        self.assertTrue(self.manager.wait_for_pending(0))
+
+
+class TestToolRegistry(unittest.TestCase):
+    def setUp(self):
+        self.canvas = object()
+        self.registry = ToolRegistry(self.canvas)
+        
+    def test_tool_created_lazily_once(self):
+        self.assertFalse(self.registry.is_loaded("eraser"))
+        eraser = self.registry.get("eraser")
+        self.assertIsInstance(eraser, EraserTool)
+        self.assertIs(eraser.canvas, self.canvas)
+        self.assertIs(self.registry.get("eraser"), eraser)
+        
+    def test_tool_state_persists(self):
+        self.registry.get("eraser").size = 42
+        self.assertEqual(self.registry.get("eraser").size, 42)
+        
+    def test_builtin_factories_resolve(self):
+        for name in ("brush", "eraser", "line", "rectangle", "circle", "text"):
+            self.assertIsInstance(self.registry.get(name), BaseTool)
+            
+    def test_unknown_tool(self):
+        self.assertIsNone(self.registry.get("laser"))
+        
+    def test_register_external_tool(self):
+        created = []
+        self.registry.register("laser", lambda canvas: created.append(canvas) or "laser-tool")
+        self.assertIn("laser", self.registry.names())
+        self.assertEqual(self.registry.get("laser"), "laser-tool")
+        self.registry.get("laser")
+        self.assertEqual(created, [self.canvas])
+        
+    def test_capabilities(self):
+        self.assertTrue(self.registry.get("brush").supports_width)
+        self.assertTrue(self.registry.get("text").supports_font_size)
+        self.assertFalse(self.registry.get("eraser").supports_color)
+
+
 if __name__ == "__main__":
     unittest.main()